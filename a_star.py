@@ -1,61 +1,154 @@
-# A* search algorithm (Node, heuristic, step-by-step search)
+# A* search algorithm (heap entries, heuristic, step-by-step search)
+#
+# The open list holds plain (f, h, counter, cell_id) tuples, so heapq compares them in C and
+# equal-f ties go deterministically to the lower h (then to the earlier push). g costs and
+# parent links live in arrays indexed by cell id, and stale duplicates are skipped on pop.
+# With buckets=True the open list is a BucketQueue keyed by f instead (headless only; the
+# journaled GUI path keeps the heap). Terrain weights, if the grid has them, replace the unit step.
+# h_fn(cell) swaps in another consistent heuristic (e.g. landmarks.py) for the inlined Manhattan.
 
-import heapq
-from constants import moves
-from maze import is_valid
-from constants import ROWS, COLS  # to ensure bounds
+from array import array
+from collections import namedtuple
+from itertools import count
+from bucket_queue import BucketQueue, queue_ops
+from events import Expand, Push, Relax, Goal
+from instrumentation import phase
 
-def get_neighbors(position):
-    row, col = position
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # Up, Down, Left, Right
-    neighbors = []
-
-    for dr, dc in directions:
-        r, c = row + dr, col + dc
-        if 0 <= r < ROWS and 0 <= c < COLS:
-            neighbors.append((r, c))
-
-    return neighbors
-
-class Node:
-    def __init__(self, position, g, h, parent=None):
-        self.position = position
-        self.g = g # cost from the start node to this node
-        self.h = h # heuristic estimate from this node to the goal
-        self.f = g + h # total estimated cost of the cheapest path through this node
-        self.parent = parent
-
-    def __lt__(self, other):
-        return self.f < other.f #f  is used to compare nodes in the priority queue (open_set)
+UNSEEN = -1  # g / parent value for cells the search has not reached
 
 def heuristic(a, b):
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def reconstruct_path(node):
+def reconstruct_path(parent, cell, grid):
     path = []
-    while node:
-        path.append(node.position)
-        node = node.parent
+    while cell != UNSEEN:
+        path.append(grid.position(cell))
+        cell = parent[cell]
     return path[::-1]
 
-def expand_node(current_node, open_set, visited, parents, open_dict, obstacles, goal):
+def init_search(grid, start, goal, buckets=False, h_fn=None):
+    # Fresh search state: open list, g array, parent array, closed bitmap and the tie-break counter
+    g = array("i", [UNSEEN]) * grid.size
+    parent = array("i", [UNSEEN]) * grid.size
+    closed = bytearray(grid.size)
+    start_cell = grid.index(start)
+    h = heuristic(start, goal) if h_fn is None else h_fn(start_cell)
+    g[start_cell] = 0
+    open_set = [(h, h, 0, start_cell)]
+    if buckets:
+        # With a consistent h, f never drops along an edge and grows by at most twice its cost
+        open_set = BucketQueue(2 * grid.max_weight() + 1, open_set)
+    return open_set, g, parent, closed, count(1)
+
+def expand_node(cell, open_set, g, parent, closed, counter, grid, goal, journal=None, h_fn=None):
+    cols = grid.cols
+    goal_r, goal_c = goal
+    weights = grid.weights
+    base_g = g[cell]
+    tentative_g = base_g + 1
+    push = queue_ops(open_set)[0]
     new_frontier = []
-    neighbors = get_neighbors(current_node.position)
-    for neighbor in neighbors:
-        if neighbor in obstacles or neighbor in visited:
+    for neighbor in grid.neighbors(cell):
+        if closed[neighbor]:
             continue
-        tentative_g = current_node.g + 1
-        if neighbor not in open_dict or tentative_g < open_dict[neighbor]:
-            neighbor_node = Node(neighbor, tentative_g, heuristic(neighbor, goal), current_node)
-            heapq.heappush(open_set, neighbor_node)
-            open_dict[neighbor] = tentative_g
-            parents[neighbor] = current_node.position
-            new_frontier.append(neighbor)
-    visited.add(current_node.position)
+        if weights is not None:
+            tentative_g = base_g + weights[neighbor]
+        old_g = g[neighbor]
+        if old_g != UNSEEN and old_g <= tentative_g:
+            continue
+        if h_fn is None:
+            r, c = divmod(neighbor, cols)
+            h = abs(r - goal_r) + abs(c - goal_c)
+        else:
+            h = h_fn(neighbor)
+        entry = (tentative_g + h, h, next(counter), neighbor)
+        if journal is None:
+            g[neighbor] = tentative_g
+            parent[neighbor] = cell
+            push(open_set, entry)
+        else:
+            journal.write(g, neighbor, tentative_g)
+            journal.write(parent, neighbor, cell)
+            journal.heappush(open_set, entry)
+        new_frontier.append(neighbor)
+    if journal is None:
+        closed[cell] = 1
+    else:
+        journal.write(closed, cell, 1)
     return new_frontier
 
-def print_path(label, path):
-    print(f"{label}: [{' -> '.join(str(p) for p in path)}]")
+def pop_live(open_set, g, closed, journal=None):
+    # Pop entries until one is neither closed nor superseded by a cheaper push; None if exhausted
+    pop = queue_ops(open_set)[1] if journal is None else journal.heappop
+    while open_set:
+        f, h, _, cell = pop(open_set)
+        if not closed[cell] and f - h == g[cell]:
+            return cell
+    return None
+
+def search_step(open_set, g, parent, closed, counter, grid, goal, journal=None, h_fn=None):
+    # Pop the next live entry (skipping stale duplicates) and expand it unless it is the goal.
+    # Returns (cell, new_frontier); cell is None once the open list is exhausted.
+    cell = pop_live(open_set, g, closed, journal)
+    if cell is None:
+        return None, []
+    if cell == grid.index(goal):
+        return cell, []
+    new_frontier = expand_node(cell, open_set, g, parent, closed, counter, grid, goal, journal, h_fn)
+    return cell, new_frontier
+
+def step_events(open_set, g, parent, closed, counter, grid, goal, journal=None, h_fn=None):
+    # The same step as search_step, yielded as Expand, then Push / Relax per neighbour, or Goal.
+    # The step only runs as the generator is consumed.
+    cell = pop_live(open_set, g, closed, journal)
+    if cell is None:
+        yield Goal([], None)
+        return
+    position = grid.position(cell)
+    yield Expand(position, g[cell])
+    if position == goal:
+        yield Goal(reconstruct_path(parent, cell, grid), g[cell])
+        return
+    before = {neighbor: g[neighbor] for neighbor in grid.neighbors(cell)}
+    for neighbor in expand_node(cell, open_set, g, parent, closed, counter, grid, goal, journal, h_fn):
+        event = Push if before[neighbor] == UNSEEN else Relax
+        yield event(grid.position(neighbor), g[neighbor], position)
+
+def search_events(grid, start, goal, buckets=False, h_fn=None):
+    # Whole search as one event stream, ending with a Goal event
+    state = init_search(grid, start, goal, buckets, h_fn)
+    while True:
+        for event in step_events(*state, grid, goal, h_fn=h_fn):
+            yield event
+            if type(event) is Goal:
+                return
+
+SearchResult = namedtuple("SearchResult", ["path", "cost", "expanded", "pushed"])
 
-def print_frontier(open_dict):
-    print("Frontier:", list(open_dict.keys()))
+def solve(grid, start, goal, buckets=False, h_fn=None, stats=None):
+    # Run A* to completion without pygame, console output or per-step snapshots
+    with phase(stats, "init"):
+        open_set, g, parent, closed, counter = init_search(grid, start, goal, buckets, h_fn)
+    goal_cell = grid.index(goal)
+    expanded = 0
+    pushed = 1
+    with phase(stats, "search"):
+        while True:
+            cell, new_frontier = search_step(open_set, g, parent, closed, counter, grid, goal, h_fn=h_fn)
+            if cell is None:
+                break
+            expanded += 1
+            pushed += len(new_frontier)
+            if stats is not None:
+                stats.sample_frontier(len(open_set))
+            if cell == goal_cell:
+                break
+    path, cost = [], None
+    if cell is not None:
+        with phase(stats, "path"):
+            path = reconstruct_path(parent, cell, grid)
+        cost = g[cell]
+    if stats is not None:
+        stats.tally(expanded, pushed, len(open_set), grid.size - g.count(UNSEEN))
+        stats.finish()
+    return SearchResult(path, cost, expanded, pushed)
@@ -0,0 +1,39 @@
+# Compressed sparse row (CSR) adjacency for a grid maze
+#
+# offsets has size + 1 entries and the free neighbours of cell i are targets[offsets[i]:offsets[i + 1]],
+# in the same up, down, left, right order as Grid.neighbors. Compiling costs one pass over the
+# grid; afterwards neighbour enumeration is a slice read with no bounds or occupancy checks.
+
+from array import array
+
+
+class Adjacency:
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def compile(cls, grid):
+        rows, cols = grid.rows, grid.cols
+        cells = grid.cells
+        offsets = array("i", [0]) * (grid.size + 1)
+        targets = array("i")
+        append = targets.append
+        cell = 0
+        for r in range(rows):
+            for c in range(cols):
+                if r > 0 and not cells[cell - cols]:
+                    append(cell - cols)
+                if r < rows - 1 and not cells[cell + cols]:
+                    append(cell + cols)
+                if c > 0 and not cells[cell - 1]:
+                    append(cell - 1)
+                if c < cols - 1 and not cells[cell + 1]:
+                    append(cell + 1)
+                cell += 1
+                offsets[cell] = len(targets)
+        return cls(offsets, targets)
+
+    def neighbors(self, cell):
+        offsets = self.offsets
+        return self.targets[offsets[cell]:offsets[cell + 1]]
@@ -0,0 +1,184 @@
+# Batch runner: solve many mazes and start/goal queries across a pool of worker processes
+#
+# Input is a directory of .json maze files, a JSON-lines file, or "-" for stdin. Each record looks like
+#   {"id": "m1", "rows": 5, "cols": 6, "obstacles": [[0, 1], [2, 1]], "queries": [[[0, 0], [4, 5]]]}
+# or, for large maps, a .maze file that each worker memory-maps instead of receiving the cells:
+#   {"id": "big", "file": "big.maze", "queries": [[[0, 0], [999, 999]]]}
+# (queries default to the file's own start and goal)
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+from maze import Grid
+from maze_file import load_maze
+from a_star import solve as a_star_solve
+from bidirectional_search import bidirectional_dijkstra
+from forward_chaining import solve as gmp_solve
+from jump_point_search import solve as jps_solve
+from landmarks import solve as alt_solve
+from ida_star import solve as ida_solve
+from result_cache import ResultCache
+
+SOLVERS = {
+    "astar": a_star_solve,
+    "astar-dial": partial(a_star_solve, buckets=True),
+    "alt": alt_solve,
+    "jps": jps_solve,
+    "ida": ida_solve,
+    "bidirectional": bidirectional_dijkstra,
+    "bidirectional-dial": partial(bidirectional_dijkstra, buckets=True),
+    "gmp": gmp_solve,
+    "gmp-magic": partial(gmp_solve, goal_directed=True),
+    "gmp-fixpoint": partial(gmp_solve, fixpoint=True),
+}
+
+def load_mazes(source):
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".json"):
+                with open(os.path.join(source, name)) as f:
+                    record = json.load(f)
+                record.setdefault("id", os.path.splitext(name)[0])
+                yield record
+        return
+    stream = sys.stdin if source == "-" else open(source)
+    try:
+        for line_number, line in enumerate(stream):
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault("id", line_number)
+                yield record
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+_caches = {}  # per-process ResultCache for each cache directory in use
+
+def make_jobs(records, solvers, queries_per_task, include_paths, cache_dir=None):
+    # Workers get the occupancy bitmap as raw bytes rather than a pickled set of tuples
+    for record in records:
+        if "file" in record:
+            # Workers map the file themselves; only its path goes through the pool
+            maze = load_maze(record["file"])
+            grid, data = maze.grid, record["file"]
+            if "queries" not in record and (maze.start is None or maze.goal is None):
+                raise ValueError(f"maze {record['id']!r}: {record['file']} has no start and goal, "
+                                 f"so the record needs \"queries\"")
+            queries = [(tuple(s), tuple(g)) for s, g in record.get("queries", [(maze.start, maze.goal)])]
+        else:
+            grid = Grid(record["rows"], record["cols"], (tuple(pos) for pos in record.get("obstacles", ())))
+            data = bytes(grid.cells)
+            queries = [(tuple(s), tuple(g)) for s, g in record["queries"]]
+        # The cache key's maze hash is computed once here, not by every job that rebuilds the grid
+        zobrist = grid.zobrist if cache_dir is not None else None
+        for i in range(0, len(queries), queries_per_task):
+            yield record["id"], grid.rows, grid.cols, data, zobrist, queries[i:i + queries_per_task], solvers, include_paths, cache_dir
+
+def run_job(job):
+    maze_id, rows, cols, data, zobrist, queries, solvers, include_paths, cache_dir = job
+    if isinstance(data, str):
+        grid = load_maze(data).grid  # left uncompiled: that would read the whole file up front
+    else:
+        grid = Grid.from_bytes(rows, cols, data)
+        grid.adjacency()  # compiled once, shared by every query and solver in the job
+    cache = None
+    if cache_dir is not None:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = _caches[cache_dir] = ResultCache(directory=cache_dir)
+    results = []
+    for start, goal in queries:
+        for name in solvers:
+            t0 = time.perf_counter()
+            if cache is None:
+                result = SOLVERS[name](grid, start, goal)
+            else:
+                result = cache.solve(SOLVERS[name], name, grid, start, goal, zobrist)
+            elapsed = time.perf_counter() - t0
+            entry = {
+                "maze": maze_id,
+                "start": start,
+                "goal": goal,
+                "solver": name,
+                "cost": result.cost,
+                "expanded": result.expanded,
+                "pushed": result.pushed,
+                "seconds": elapsed,
+            }
+            if include_paths:
+                entry["path"] = result.path
+            results.append(entry)
+    return results
+
+def run_jobs(jobs):
+    # One pool task: several jobs, so small jobs do not pay one round trip each
+    return [entry for job in jobs for entry in run_job(job)]
+
+def run_batch(records, solvers, workers=None, queries_per_task=64, chunksize=4, include_paths=False, cache_dir=None):
+    summary = {name: {"queries": 0, "solved": 0, "expanded": 0, "seconds": 0.0} for name in solvers}
+    results = []
+    t0 = time.perf_counter()
+
+    def collect(chunk):
+        for entry in chunk:
+            totals = summary[entry["solver"]]
+            totals["queries"] += 1
+            totals["solved"] += entry["cost"] is not None
+            totals["expanded"] += entry["expanded"]
+            totals["seconds"] += entry["seconds"]
+        results.extend(chunk)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep only a bounded window of tasks in flight (drained oldest first, so results keep
+        # input order): mazes are read from the source as workers free up, not all up front
+        window = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        jobs = make_jobs(records, solvers, queries_per_task, include_paths, cache_dir)
+        while True:
+            chunk = list(islice(jobs, chunksize))
+            if chunk:
+                pending.append(executor.submit(run_jobs, chunk))
+            if pending and (len(pending) >= window or not chunk):
+                collect(pending.popleft().result())
+            elif not chunk:
+                break
+    return {"wall_seconds": time.perf_counter() - t0, "summary": summary, "results": results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a batch of mazes in parallel")
+    parser.add_argument("source", help="directory of .json mazes, JSON-lines file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output JSON file (default: stdout)")
+    parser.add_argument("--solvers", default=",".join(SOLVERS), help="comma-separated solver names")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queries-per-task", type=int, default=64)
+    parser.add_argument("--chunksize", type=int, default=4)
+    parser.add_argument("--paths", action="store_true", help="include full paths in the output")
+    parser.add_argument("--cache", metavar="DIR", help="reuse results of earlier identical queries stored in DIR")
+    args = parser.parse_args(argv)
+
+    solvers = args.solvers.split(",")
+    for name in solvers:
+        if name not in SOLVERS:
+            parser.error(f"unknown solver {name!r} (choose from {', '.join(SOLVERS)})")
+
+    try:
+        report = run_batch(load_mazes(args.source), solvers, args.workers,
+                           args.queries_per_task, args.chunksize, args.paths, args.cache)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Benchmark: run every solver headless on seeded mazes across sizes and densities, record JSON results
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from maze import generate_random_grid
+from batch import SOLVERS
+from instrumentation import SearchStats
+
+def measure(solver, grid, start, goal, repeat, track_memory, track_stats=False):
+    # Best-of-repeat wall time; peak memory and search counters come from separate runs
+    # so they don't skew timing
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = solver(grid, start, goal)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        solver(grid, start, goal)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    stats = None
+    if track_stats:
+        stats = SearchStats()
+        solver(grid, start, goal, stats=stats)
+        stats = stats.as_dict()
+    return result, best, peak, stats
+
+def run_benchmarks(sizes, densities, seeds, solvers, repeat=1, track_memory=True, log=None, track_stats=False):
+    runs = []
+    for size in sizes:
+        start, goal = (0, 0), (size - 1, size - 1)
+        for density in densities:
+            for seed in seeds:
+                grid = generate_random_grid(start, goal, size, size, density=density, seed=seed)
+                grid.adjacency()  # compile once per maze, outside the timed runs
+                for name in solvers:
+                    result, seconds, peak, stats = measure(SOLVERS[name], grid, start, goal, repeat, track_memory, track_stats)
+                    run = {
+                        "solver": name,
+                        "rows": size,
+                        "cols": size,
+                        "density": density,
+                        "seed": seed,
+                        "seconds": seconds,
+                        "cost": result.cost,
+                        "expanded": result.expanded,
+                        "pushed": result.pushed,
+                        "peak_bytes": peak,
+                    }
+                    if stats is not None:
+                        run["stats"] = stats
+                    runs.append(run)
+                    if log:
+                        log(run)
+    return runs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the maze solvers")
+    parser.add_argument("--sizes", default="32,128,512,1024", help="comma-separated grid side lengths")
+    parser.add_argument("--densities", default="0.0,0.2,0.35", help="comma-separated obstacle densities")
+    parser.add_argument("--seeds", default="0", help="comma-separated maze seeds")
+    # IDA* is opt-in: it re-expands every cell once per bound, far slower than the rest on large maps
+    parser.add_argument("--solvers", default=",".join(name for name in SOLVERS if name != "ida"),
+                        help="comma-separated solver names")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory run")
+    parser.add_argument("--stats", action="store_true", help="add search counters and phase timers from an extra run")
+    parser.add_argument("-o", "--output", default="-", help="output JSON file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    solvers = args.solvers.split(",")
+    for name in solvers:
+        if name not in SOLVERS:
+            parser.error(f"unknown solver {name!r} (choose from {', '.join(SOLVERS)})")
+
+    def log(run):
+        print(f"{run['solver']:>14} {run['rows']}x{run['cols']} density={run['density']} seed={run['seed']}: "
+              f"{run['seconds']:.4f}s expanded={run['expanded']}", file=sys.stderr)
+
+    runs = run_benchmarks(
+        [int(x) for x in args.sizes.split(",")],
+        [float(x) for x in args.densities.split(",")],
+        [int(x) for x in args.seeds.split(",")],
+        solvers, args.repeat, not args.no_memory, log, args.stats,
+    )
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": runs,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 # Bidirectional Dijkstra Maze Solver with Full GUI and Console Output
 
+import argparse
 import heapq
 import sys
-import copy
 import pygame
 import math
-import random
+from maze import Grid, generate_random_grid
+from bidirectional_search import step_events
+from events import Meet, Goal, log_events
+from state_manager import Journal
+from visualisation import GridRenderer, render_text, play_trace
+from step_trace import TraceReader, SideView, NONE
 
 # Configuration
 ROWS, COLS = 5, 6
@@ -17,90 +22,38 @@ WINDOW_HEIGHT = ROWS * CELL_SIZE + NUM_BUTTON_ROWS * BUTTON_HEIGHT + BUTTON_GAP
 
 start = (0, 0)
 goal = (4, 5)
-moves = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 DEFAULT_OBSTACLES = {(0, 1), (2, 1), (3, 1), (2, 3), (3, 4), (4, 4)}
 
-# Validate cell
-
-def is_valid(pos, obstacles):
-    r, c = pos
-    return 0 <= r < ROWS and 0 <= c < COLS and pos not in obstacles
-
-# BFS solvability check
-def is_solvable(start, goal, obstacles, rows, cols):
-    from collections import deque
-    queue = deque([start])
-    visited = {start}
-    while queue:
-        current = queue.popleft()
-        if current == goal:
-            return True
-        for move in moves:
-            neighbor = (current[0] + move[0], current[1] + move[1])
-            if 0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols and neighbor not in obstacles and neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
-    return False
-
-# Random solvable maze
-def generate_random_obstacles(start, goal, rows, cols, num_obstacles):
-    all_cells = [(r, c) for r in range(rows) for c in range(cols)]
-    all_cells.remove(start)
-    all_cells.remove(goal)
-    while True:
-        obstacles = set(random.sample(all_cells, num_obstacles))
-        if is_solvable(start, goal, obstacles, rows, cols):
-            return obstacles
-
-# Draw arrow between cells
-def draw_arrow(screen, from_cell, to_cell, color=(100, 100, 255)):
-    fx, fy = from_cell[1] * CELL_SIZE + CELL_SIZE // 2, from_cell[0] * CELL_SIZE + CELL_SIZE // 2
-    tx, ty = to_cell[1] * CELL_SIZE + CELL_SIZE // 2, to_cell[0] * CELL_SIZE + CELL_SIZE // 2
-    pygame.draw.line(screen, color, (fx, fy), (tx, ty), 4)
-    angle = math.atan2(ty - fy, tx - fx)
-    arrow_size = 14
-    for delta in [-0.4, 0.4]:
-        end_x = tx - arrow_size * math.cos(angle + delta)
-        end_y = ty - arrow_size * math.sin(angle + delta)
-        pygame.draw.line(screen, color, (tx, ty), (end_x, end_y), 4)
-
-# Grid drawing with states
-def draw_grid(screen, visited_fwd, visited_bwd, path, parents_fwd, parents_bwd, obstacles, meet_node):
-    for r in range(ROWS):
-        for c in range(COLS):
-            rect = pygame.Rect(c * CELL_SIZE, r * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pos = (r, c)
-            if pos in obstacles:
-                color = (0, 0, 0)
-            elif pos == start:
-                color = (0, 255, 0)
-            elif pos == goal:
-                color = (255, 0, 0)
-            elif pos in path:
-                color = (0, 0, 255)
-            elif pos == meet_node:
-                color = (255, 215, 0)
-            elif pos in visited_fwd:
-                color = (180, 220, 255)
-            elif pos in visited_bwd:
-                color = (255, 200, 220)
-            else:
-                color = (255, 255, 255)
-            pygame.draw.rect(screen, color, rect)
-            pygame.draw.rect(screen, (0, 0, 0), rect, 1)
-
-    for pos in visited_fwd:
-        parent = parents_fwd.get(pos)
-        if parent:
-            draw_arrow(screen, parent, pos, color=(100, 120, 255))
-    for pos in visited_bwd:
-        parent = parents_bwd.get(pos)
-        if parent:
-            draw_arrow(screen, parent, pos, color=(255, 100, 120))
+# Cell appearance for the dirty-cell renderer
+def cell_look(pos, visited_fwd, visited_bwd, path, parents_fwd, parents_bwd, grid, meet_node, endpoints=(start, goal)):
+    if grid.is_blocked(pos):
+        color = (0, 0, 0)
+    elif pos == endpoints[0]:
+        color = (0, 255, 0)
+    elif pos == endpoints[1]:
+        color = (255, 0, 0)
+    elif pos in path:
+        color = (0, 0, 255)
+    elif pos == meet_node:
+        color = (255, 215, 0)
+    elif pos in visited_fwd:
+        color = (180, 220, 255)
+    elif pos in visited_bwd:
+        color = (255, 200, 220)
+    else:
+        color = (255, 255, 255)
+
+    links = [None, None]
+    parent = parents_fwd.get(pos) if pos in visited_fwd else None
+    if parent:
+        links[0] = (parent, (100, 120, 255), 4, True)
+    parent = parents_bwd.get(pos) if pos in visited_bwd else None
+    if parent:
+        links[1] = (parent, (255, 100, 120), 4, True)
+    return color, None, links
 
 # Button rendering
 def draw_buttons(screen):
-    font = pygame.font.SysFont(None, 32)
     width = COLS * CELL_SIZE
     top_y = ROWS * CELL_SIZE
     step_rect = pygame.Rect(width//2 - 170 - 10, top_y, 150, BUTTON_HEIGHT)
@@ -113,25 +66,10 @@ def draw_buttons(screen):
     pygame.draw.rect(screen, (100, 60, 180), def_rect)
     for rect, text in [(step_rect, "Step"), (back_rect, "Back"),
                        (rand_rect, "Randomize"), (def_rect, "Default Maze")]:
-        label = font.render(text, True, (255, 255, 255))
+        label = render_text(text, 32, (255, 255, 255))
         screen.blit(label, (rect.centerx - label.get_width() // 2, rect.centery - label.get_height() // 2))
-    pygame.display.flip()
     return step_rect, back_rect, rand_rect, def_rect
 
-# Path reconstruction
-def reconstruct_path(meet, parents_fwd, parents_bwd):
-    path_fwd, path_bwd = [], []
-    curr = meet
-    while curr:
-        path_fwd.append(curr)
-        curr = parents_fwd.get(curr)
-    path_fwd.reverse()
-    curr = parents_bwd.get(meet)
-    while curr:
-        path_bwd.append(curr)
-        curr = parents_bwd.get(curr)
-    return path_fwd + path_bwd
-
 # Main visualizer
 def bidirectional_dijkstra_gui(start, goal):
     pygame.init()
@@ -139,88 +77,98 @@ def bidirectional_dijkstra_gui(start, goal):
     pygame.display.set_caption("Bidirectional Dijkstra Visualizer")
     clock = pygame.time.Clock()
 
-    def reset_all(obstacles):
+    def reset_all(grid):
         open_fwd, open_bwd = [], []
         heapq.heappush(open_fwd, (0, start))
         heapq.heappush(open_bwd, (0, goal))
         visited_fwd, visited_bwd = {start: 0}, {goal: 0}
         parents_fwd, parents_bwd = {start: None}, {goal: None}
         meet_node, final_path, found = None, [], False
-        history = [(copy.deepcopy(open_fwd), copy.deepcopy(open_bwd),
-                    copy.deepcopy(visited_fwd), copy.deepcopy(visited_bwd),
-                    copy.deepcopy(parents_fwd), copy.deepcopy(parents_bwd),
-                    meet_node, found, copy.deepcopy(final_path))]
-        return open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, found, final_path, history
-
-    obstacles = generate_random_obstacles(start, goal, ROWS, COLS, 8)
-    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, found, final_path, history = reset_all(obstacles)
-    expand_forward = True
+        mu = math.inf  # best start-to-goal cost through a meeting node seen so far
+        history = Journal()
+        return open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, mu, found, final_path, history
+
+    grid = generate_random_grid(start, goal, ROWS, COLS, 8)
+    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, mu, found, final_path, history = reset_all(grid)
+
+    def look(pos):
+        return cell_look(pos, visited_fwd, visited_bwd, path_cells, parents_fwd, parents_bwd, grid, meet_node)
+
+    def refresh(cells, old_meet):
+        # Mark cells touched by a step or undo, plus meeting-node and path changes, for repaint
+        nonlocal path_cells
+        new_path = set(final_path)
+        renderer.invalidate(path_cells ^ new_path)
+        renderer.invalidate(cells)
+        renderer.invalidate(pos for pos in (old_meet, meet_node) if pos is not None)
+        path_cells = new_path
+
+    path_cells = set()
+    renderer = GridRenderer(grid.rows, grid.cols, look)
+    screen.fill((220, 220, 220))
+    step_rect, back_rect, rand_rect, def_rect = draw_buttons(screen)
+    pygame.display.flip()
 
     while True:
-        screen.fill((220, 220, 220))
-        draw_grid(screen, visited_fwd, visited_bwd, final_path, parents_fwd, parents_bwd, obstacles, meet_node)
-        step_rect, back_rect, rand_rect, def_rect = draw_buttons(screen)
-
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if step_rect.collidepoint(event.pos) and not found:
-                    history.append((copy.deepcopy(open_fwd), copy.deepcopy(open_bwd),
-                                    copy.deepcopy(visited_fwd), copy.deepcopy(visited_bwd),
-                                    copy.deepcopy(parents_fwd), copy.deepcopy(parents_bwd),
-                                    meet_node, found, copy.deepcopy(final_path)))
-                    if expand_forward and open_fwd:
-                        g_fwd, node_fwd = heapq.heappop(open_fwd)
-                        print(f"[Forward] Expanding: {node_fwd}, Cost: {g_fwd}")
-                        for move in moves:
-                            neighbor = (node_fwd[0] + move[0], node_fwd[1] + move[1])
-                            if is_valid(neighbor, obstacles) and (neighbor not in visited_fwd or g_fwd + 1 < visited_fwd[neighbor]):
-                                visited_fwd[neighbor] = g_fwd + 1
-                                parents_fwd[neighbor] = node_fwd
-                                heapq.heappush(open_fwd, (g_fwd + 1, neighbor))
-                                print(f" -> Forward adding: {neighbor}, Cost: {g_fwd + 1}")
-                                if neighbor in visited_bwd:
-                                    total = visited_fwd[neighbor] + visited_bwd[neighbor]
-                                    if meet_node is None or total < visited_fwd[meet_node] + visited_bwd[meet_node]:
-                                        meet_node, found = neighbor, True
-                    elif not expand_forward and open_bwd:
-                        g_bwd, node_bwd = heapq.heappop(open_bwd)
-                        print(f"[Backward] Expanding: {node_bwd}, Cost: {g_bwd}")
-                        for move in moves:
-                            neighbor = (node_bwd[0] + move[0], node_bwd[1] + move[1])
-                            if is_valid(neighbor, obstacles) and (neighbor not in visited_bwd or g_bwd + 1 < visited_bwd[neighbor]):
-                                visited_bwd[neighbor] = g_bwd + 1
-                                parents_bwd[neighbor] = node_bwd
-                                heapq.heappush(open_bwd, (g_bwd + 1, neighbor))
-                                print(f" -> Backward adding: {neighbor}, Cost: {g_bwd + 1}")
-                                if neighbor in visited_fwd:
-                                    total = visited_fwd[neighbor] + visited_bwd[neighbor]
-                                    if meet_node is None or total < visited_fwd[meet_node] + visited_bwd[meet_node]:
-                                        meet_node, found = neighbor, True
-                    if meet_node and found:
-                        final_path = reconstruct_path(meet_node, parents_fwd, parents_bwd)
-                        print(f"Meeting node: {meet_node}")
-                        print("Final Path:", final_path)
-                        print(f"Path length: {len(final_path) - 1}")
-                    expand_forward = not expand_forward
-
-                elif back_rect.collidepoint(event.pos) and len(history) > 1:
-                    history.pop()
-                    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, found, final_path = copy.deepcopy(history[-1])
-                    expand_forward = not expand_forward
+                    old_meet = meet_node
+                    history.begin_step(meet_node, mu, found, final_path)
+                    # Expand whichever frontier is smaller; stop once top_fwd + top_bwd >= mu
+                    for step_event in log_events(step_events(open_fwd, open_bwd, visited_fwd, visited_bwd,
+                                                             parents_fwd, parents_bwd, grid, mu, meet_node, history)):
+                        if type(step_event) is Meet:
+                            meet_node, mu = step_event
+                        elif type(step_event) is Goal:
+                            found = True
+                            final_path = step_event.path
+                            if final_path:
+                                print(f"Path length: {len(final_path) - 1}")
+                    refresh(history.last_keys(visited_fwd, visited_bwd, parents_fwd, parents_bwd), old_meet)
+
+                elif back_rect.collidepoint(event.pos) and len(history) > 0:
+                    old_meet = meet_node
+                    touched = history.last_keys(visited_fwd, visited_bwd, parents_fwd, parents_bwd)
+                    meet_node, mu, found, final_path = history.undo_step()
+                    refresh(touched, old_meet)
 
                 elif rand_rect.collidepoint(event.pos):
-                    obstacles = generate_random_obstacles(start, goal, ROWS, COLS, 8)
-                    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, found, final_path, history = reset_all(obstacles)
-                    expand_forward = True
+                    grid = generate_random_grid(start, goal, ROWS, COLS, 8)
+                    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, mu, found, final_path, history = reset_all(grid)
+                    path_cells = set()
+                    renderer = GridRenderer(grid.rows, grid.cols, look)
 
                 elif def_rect.collidepoint(event.pos):
-                    obstacles = set(DEFAULT_OBSTACLES)
-                    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, found, final_path, history = reset_all(obstacles)
-                    expand_forward = True
-
+                    grid = Grid(ROWS, COLS, DEFAULT_OBSTACLES)
+                    open_fwd, open_bwd, visited_fwd, visited_bwd, parents_fwd, parents_bwd, meet_node, mu, found, final_path, history = reset_all(grid)
+                    path_cells = set()
+                    renderer = GridRenderer(grid.rows, grid.cols, look)
+
+        dirty = renderer.draw(screen)
+        if dirty:
+            pygame.display.update(dirty)
         clock.tick(60)
 
+def play(base):
+    # Scrub a trace recorded with `python step_trace.py bidirectional BASE`
+    reader = TraceReader(base)
+    cols = reader.grid.cols
+
+    def look(pos, state, path):
+        fwd, bwd = SideView(state, 0, cols), SideView(state, 1, cols)
+        meet_node = divmod(state.meet, cols) if state.meet != NONE else None
+        return cell_look(pos, fwd, bwd, path, fwd, bwd, reader.grid, meet_node, (reader.start, reader.goal))
+    play_trace(reader, look, "Bidirectional Dijkstra Trace Playback")
+    reader.close()
+
 if __name__ == '__main__':
-    bidirectional_dijkstra_gui(start, goal)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bidirectional Dijkstra Visualizer")
+    parser.add_argument("--trace", help="play back a recorded step trace instead of searching live")
+    args = parser.parse_args()
+    if args.trace:
+        play(args.trace)
+    else:
+        bidirectional_dijkstra_gui(start, goal)
@@ -0,0 +1,150 @@
+# Bidirectional Dijkstra search (meeting-cost bound, stale-entry skipping, balanced frontiers)
+#
+# Stepping into a cell costs its terrain weight (1 on unweighted grids). The backward search walks
+# edges in reverse, so moving from node to a neighbour there costs the weight of node itself.
+
+import math
+from a_star import SearchResult
+from bucket_queue import BucketQueue, queue_ops, top_key
+from events import Expand, Push, Relax, Meet, Goal
+from instrumentation import phase
+
+def reconstruct_path(meet, parents_fwd, parents_bwd):
+    path_fwd, path_bwd = [], []
+    curr = meet
+    while curr:
+        path_fwd.append(curr)
+        curr = parents_fwd.get(curr)
+    path_fwd.reverse()
+    curr = parents_bwd.get(meet)
+    while curr:
+        path_bwd.append(curr)
+        curr = parents_bwd.get(curr)
+    return path_fwd + path_bwd
+
+def search_finished(open_fwd, open_bwd, mu):
+    # Standard stopping rule: no path through an unsettled node can beat the best meeting cost mu
+    if not open_fwd or not open_bwd:
+        return True
+    return top_key(open_fwd) + top_key(open_bwd) >= mu
+
+def pop_live(open_set, dist, journal=None):
+    # Pop entries until one still matches its node's best distance; (None, None) if exhausted
+    pop = queue_ops(open_set)[1] if journal is None else journal.heappop
+    while open_set:
+        g, node = pop(open_set)
+        if g == dist[node]:
+            return g, node
+    return None, None
+
+def relax_neighbors(node, g, open_set, dist, parents, other_dist, grid, mu, meet, journal=None, backward=False):
+    # Relax the edges out of node in one direction. Returns (new_frontier, mu, meet).
+    push = queue_ops(open_set)[0]
+    new_frontier = []
+    cols = grid.cols
+    weights = grid.weights
+    new_g = g + 1
+    if weights is not None and backward:
+        new_g = g + weights[node[0] * cols + node[1]]
+    for cell in grid.neighbors(node[0] * cols + node[1]):
+        neighbor = divmod(cell, cols)
+        if weights is not None and not backward:
+            new_g = g + weights[cell]
+        if neighbor in dist and dist[neighbor] <= new_g:
+            continue
+        if journal is None:
+            dist[neighbor] = new_g
+            parents[neighbor] = node
+            push(open_set, (new_g, neighbor))
+        else:
+            journal.set(dist, neighbor, new_g)
+            journal.set(parents, neighbor, node)
+            journal.heappush(open_set, (new_g, neighbor))
+        new_frontier.append(neighbor)
+        if neighbor in other_dist and new_g + other_dist[neighbor] < mu:
+            mu = new_g + other_dist[neighbor]
+            meet = neighbor
+    return new_frontier, mu, meet
+
+def expand_frontier(open_set, dist, parents, other_dist, grid, mu, meet, journal=None, backward=False):
+    # Pop the next live entry of one direction and relax its neighbours.
+    # Returns (node, new_frontier, mu, meet); node is None when only stale entries were left.
+    g, node = pop_live(open_set, dist, journal)
+    if node is None:
+        return None, [], mu, meet
+    new_frontier, mu, meet = relax_neighbors(node, g, open_set, dist, parents, other_dist, grid, mu, meet, journal, backward)
+    return node, new_frontier, mu, meet
+
+def step_events(open_fwd, open_bwd, dist_fwd, dist_bwd, parents_fwd, parents_bwd, grid, mu, meet, journal=None):
+    # One balanced step as events: Expand, Push / Relax per neighbour, Meet when mu improves,
+    # and Goal once the stopping rule holds. Callers track mu and meet from the Meet events.
+    if not search_finished(open_fwd, open_bwd, mu):
+        if len(open_fwd) <= len(open_bwd):
+            side, open_set, dist, parents, other_dist = "forward", open_fwd, dist_fwd, parents_fwd, dist_bwd
+        else:
+            side, open_set, dist, parents, other_dist = "backward", open_bwd, dist_bwd, parents_bwd, dist_fwd
+        g, node = pop_live(open_set, dist, journal)
+        if node is not None:
+            yield Expand(node, g, side)
+            cols = grid.cols
+            before = {divmod(cell, cols): divmod(cell, cols) in dist for cell in grid.neighbors(node[0] * cols + node[1])}
+            new_frontier, new_mu, new_meet = relax_neighbors(
+                node, g, open_set, dist, parents, other_dist, grid, mu, meet, journal, side == "backward")
+            for neighbor in new_frontier:
+                event = Relax if before[neighbor] else Push
+                yield event(neighbor, dist[neighbor], node, side)
+            if new_mu < mu:
+                mu, meet = new_mu, new_meet
+                yield Meet(meet, mu)
+    if search_finished(open_fwd, open_bwd, mu):
+        if meet is None:
+            yield Goal([], None)
+        else:
+            yield Goal(reconstruct_path(meet, parents_fwd, parents_bwd), mu)
+
+def search_events(grid, start, goal):
+    # Whole search as one event stream, ending with a Goal event
+    open_fwd, open_bwd = [(0, start)], [(0, goal)]
+    dist_fwd, dist_bwd = {start: 0}, {goal: 0}
+    parents_fwd, parents_bwd = {start: None}, {goal: None}
+    mu, meet = (0, start) if start == goal else (math.inf, None)
+    while True:
+        for event in step_events(open_fwd, open_bwd, dist_fwd, dist_bwd, parents_fwd, parents_bwd, grid, mu, meet):
+            yield event
+            if type(event) is Meet:
+                meet, mu = event
+            elif type(event) is Goal:
+                return
+
+def bidirectional_dijkstra(grid, start, goal, buckets=False, stats=None):
+    open_fwd, open_bwd = [(0, start)], [(0, goal)]
+    if buckets:
+        # Dial's algorithm: every queued g lies within one step cost of the last one popped
+        width = grid.max_weight() + 1
+        open_fwd, open_bwd = BucketQueue(width, open_fwd), BucketQueue(width, open_bwd)
+    dist_fwd, dist_bwd = {start: 0}, {goal: 0}
+    parents_fwd, parents_bwd = {start: None}, {goal: None}
+    mu, meet = (0, start) if start == goal else (math.inf, None)
+    expanded = 0
+    pushed = 2
+    with phase(stats, "search"):
+        while not search_finished(open_fwd, open_bwd, mu):
+            # Expand whichever frontier is currently smaller instead of strictly alternating
+            if len(open_fwd) <= len(open_bwd):
+                node, new_frontier, mu, meet = expand_frontier(open_fwd, dist_fwd, parents_fwd, dist_bwd, grid, mu, meet)
+            else:
+                node, new_frontier, mu, meet = expand_frontier(open_bwd, dist_bwd, parents_bwd, dist_fwd, grid, mu, meet, backward=True)
+            if node is not None:
+                expanded += 1
+                pushed += len(new_frontier)
+                if stats is not None:
+                    stats.sample_frontier(len(open_fwd) + len(open_bwd))
+    path, cost = [], None
+    if meet is not None:
+        with phase(stats, "path"):
+            path = reconstruct_path(meet, parents_fwd, parents_bwd)
+        cost = mu
+    if stats is not None:
+        stats.tally(expanded, pushed, len(open_fwd) + len(open_bwd), len(dist_fwd) + len(dist_bwd))
+        stats.finish()
+    return SearchResult(path, cost, expanded, pushed)
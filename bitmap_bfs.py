@@ -0,0 +1,142 @@
+# Bulk breadth-first search over the occupancy bitmap, one whole layer per iteration
+#
+# The free cells, the frontier and the reached set are Python ints used as bitsets (bit i = cell i),
+# so expanding a layer is a handful of shifts, ANDs and ORs that run in C over the whole grid:
+# up/down neighbours are shifts by cols, left/right shifts by 1 masked so rows do not wrap.
+# Layer indices (unit-cost distances) are kept in binary as bit planes, plane b holding the cells
+# whose layer has bit b set, and are decoded into an array of cell ids only once at the end.
+# Every layer costs O(cells / 64) word operations however small the frontier is, so a map with
+# many thin layers (a serpentine corridor) would go quadratic: after cells / 64 layers both
+# functions hand the current frontier to an ordinary cell-by-cell queue, which bounds the total
+# at about twice a plain BFS. For one-off queries on arbitrary maps a plain BFS is the safer default.
+
+import sys
+from array import array
+from collections import deque
+
+_FREE_DIGITS = bytes([0x31] + [0x30] * 255)  # occupancy byte -> "1" if free, "0" if blocked
+_DIGIT_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def _free_bits(grid):
+    # Bit i set where cell i is free; the digit string is reversed because int() reads MSB first.
+    # (bytes() because cells may be a view into a memory-mapped maze file.)
+    return int(bytes(grid.cells).translate(_FREE_DIGITS)[::-1], 2)
+
+def _column_masks(grid):
+    # Cells that can be entered from their left neighbour (c > 0) and from their right (c < cols - 1)
+    # (digit strings again run from the last cell down to cell 0)
+    rows, cols = grid.rows, grid.cols
+    if cols == 1:
+        return 0, 0
+    from_left = int((b"1" * (cols - 1) + b"0") * rows, 2)
+    from_right = int((b"0" + b"1" * (cols - 1)) * rows, 2)
+    return from_left, from_right
+
+def _expander(grid):
+    # Next-layer candidates of a frontier; the caller masks them with the free cells not yet reached
+    from_left, from_right = _column_masks(grid)
+    cols = grid.cols
+
+    def expand(frontier):
+        return frontier << cols | frontier >> cols | (frontier << 1) & from_left | (frontier >> 1) & from_right
+    return expand
+
+def _lanes(bits, size):
+    # One byte per cell (0 or 1) of a bitset, as an int with cell i in bits 8i..8i+7
+    digits = format(bits, f"0{size}b")[::-1].encode("ascii").translate(_DIGIT_BYTES)
+    return int.from_bytes(digits, "little")
+
+def _cells(bits, size):
+    # Cell ids set in a bitset, in ascending order
+    lanes = _lanes(bits, size).to_bytes(size, "little")
+    cells = []
+    cell = lanes.find(1)
+    while cell != -1:
+        cells.append(cell)
+        cell = lanes.find(1, cell + 1)
+    return cells
+
+def reachable(grid, source, target):
+    # Whether target can be reached from source (cell ids), layer by layer until it is
+    if source == target:
+        return True
+    size = grid.size
+    expand = _expander(grid)
+    target_bit = 1 << target
+    frontier = 1 << source
+    unreached = _free_bits(grid) & ~frontier
+    budget = size >> 6
+    while frontier and unreached & target_bit:
+        if not budget:
+            # Too many layers for whole-grid steps: finish with a queue over the unreached cells
+            open_cells = bytearray(_lanes(unreached, size).to_bytes(size, "little"))
+            queue = deque(_cells(frontier, size))
+            while queue:
+                for neighbor in grid.neighbors(queue.popleft()):
+                    if open_cells[neighbor]:
+                        if neighbor == target:
+                            return True
+                        open_cells[neighbor] = 0
+                        queue.append(neighbor)
+            return False
+        budget -= 1
+        frontier = expand(frontier) & unreached
+        unreached ^= frontier
+    return bool(frontier & target_bit)
+
+def bfs_layers(grid, source, target=None):
+    # BFS layer of every cell from source, which is its unit-cost distance; -1 where unreached.
+    # With a target, stops after the target's layer and leaves cells further out at -1.
+    size = grid.size
+    expand = _expander(grid)
+    stop_bit = 1 << target if target is not None else 0
+    source_bit = frontier = 1 << source
+    free = _free_bits(grid)
+    unreached = free & ~frontier
+    planes = []
+    layer = 0
+    budget = size >> 6
+    spill = 0
+    while not frontier & stop_bit:
+        if layer == budget:
+            spill = frontier  # too many layers for whole-grid steps: the queue below finishes
+            break
+        frontier = expand(frontier) & unreached
+        if not frontier:
+            break
+        unreached ^= frontier
+        layer += 1
+        if layer.bit_length() > len(planes):
+            planes.append(0)
+        for b in range(layer.bit_length()):
+            if layer >> b & 1:
+                planes[b] |= frontier
+
+    # Decode the planes a byte of the int32 result at a time; unreached cells get 0xFF in every
+    # byte, i.e. -1. Each plane's lanes hold 0 or 1, so eight of them sum without carries.
+    reached = free & ~unreached | source_bit
+    unreached = _lanes(((1 << size) - 1) & ~reached, size) * 0xFF
+    out = bytearray(4 * size)
+    for j in range(4):
+        value = unreached
+        for b, plane in enumerate(planes[8 * j:8 * j + 8]):
+            value |= _lanes(plane, size) << b
+        out[j::4] = value.to_bytes(size, "little")
+    layers = array("i")
+    layers.frombytes(out)
+    if sys.byteorder == "big":
+        layers.byteswap()
+    if spill:
+        queue = deque(_cells(spill, size))
+        while queue:
+            cell = queue.popleft()
+            d = layers[cell]
+            if target is not None and 0 <= layers[target] <= d:
+                break
+            d += 1
+            for neighbor in grid.neighbors(cell):
+                if layers[neighbor] == -1:
+                    layers[neighbor] = d
+                    queue.append(neighbor)
+    return layers
@@ -0,0 +1,66 @@
+# Bucket queue (Dial's algorithm) for small non-negative integer keys
+#
+# Entries are the same tuples the heap-based solvers push, keyed by entry[0]. With a consistent
+# heuristic and integer step costs, keys never drop below the last popped key and never run more
+# than (max step cost + 2) above it, so a ring of that many buckets gives O(1) push and pop.
+# BucketQueue.push / BucketQueue.pop take the same (queue, entry) arguments as heapq.heappush /
+# heapq.heappop, so a solver can pick either pair up front.
+
+import heapq
+
+
+class BucketQueue:
+    def __init__(self, width, entries=()):
+        self.buckets = [[] for _ in range(width)]
+        self.width = width
+        self.current = 0  # lowest key that may still be queued
+        self.size = 0
+        for entry in entries:
+            self.push(entry)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for bucket in self.buckets:
+            yield from bucket
+
+    def push(self, entry):
+        key = entry[0]
+        if self.size == 0 and not self.current <= key < self.current + self.width:
+            self.current = key
+        elif key < self.current or key - self.current >= self.width:
+            raise ValueError(f"key {key} outside bucket window [{self.current}, {self.current + self.width})")
+        self.buckets[key % self.width].append(entry)
+        self.size += 1
+
+    def _first_bucket(self):
+        # Advance current to the lowest non-empty bucket and return it
+        if self.size == 0:
+            raise IndexError("pop from empty bucket queue")
+        buckets, width = self.buckets, self.width
+        while not buckets[self.current % width]:
+            self.current += 1
+        return buckets[self.current % width]
+
+    def pop(self):
+        # Buckets are stacks, so among equal keys the most recent push (the deepest node) goes first
+        bucket = self._first_bucket()
+        self.size -= 1
+        return bucket.pop()
+
+    def min_key(self):
+        self._first_bucket()
+        return self.current
+
+
+def queue_ops(open_set):
+    # (push, pop) functions matching the kind of open list
+    if isinstance(open_set, BucketQueue):
+        return BucketQueue.push, BucketQueue.pop
+    return heapq.heappush, heapq.heappop
+
+def top_key(open_set):
+    if isinstance(open_set, BucketQueue):
+        return open_set.min_key()
+    return open_set[0][0]
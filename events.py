@@ -0,0 +1,39 @@
+# Step events: compact records the solvers yield instead of printing as they go
+#
+# Nodes are (row, col) positions. side is "forward" / "backward" for bidirectional search and
+# None otherwise; cost is None where a solver has no notion of it (forward chaining facts).
+# Nothing is formatted until a subscriber such as log_events asks for it, and the plain
+# solve() functions do not build events at all.
+
+from collections import namedtuple
+
+Expand = namedtuple("Expand", ["node", "cost", "side"], defaults=(None,))
+Push = namedtuple("Push", ["node", "cost", "parent", "side"], defaults=(None,))  # first time reached
+Relax = namedtuple("Relax", ["node", "cost", "parent", "side"], defaults=(None,))  # reached more cheaply
+Meet = namedtuple("Meet", ["node", "cost"])  # better meeting node of the two searches
+Goal = namedtuple("Goal", ["path", "cost"])  # search finished; empty path and None cost if unreachable
+
+def _side(event):
+    return f"[{event.side.capitalize()}] " if event.side else ""
+
+def format_event(event):
+    kind = type(event)
+    if kind is Expand:
+        if event.cost is None:
+            return f"{_side(event)}Expanding: {event.node}"
+        return f"{_side(event)}Expanding: {event.node}, Cost: {event.cost}"
+    if kind is Push or kind is Relax:
+        verb = "adding" if kind is Push else "relaxing"
+        cost = f", Cost: {event.cost}" if event.cost is not None else ""
+        return f" -> {_side(event)}{verb}: {event.node}{cost}, from {event.parent}"
+    if kind is Meet:
+        return f"Meeting node: {event.node}, Cost: {event.cost}"
+    if not event.path:
+        return "No path between start and goal"
+    return f"Goal reached, cost {event.cost}: [{' -> '.join(str(p) for p in event.path)}]"
+
+def log_events(events, write=print):
+    # Console subscriber: writes each event as it passes and hands it on unchanged
+    for event in events:
+        write(format_event(event))
+        yield event
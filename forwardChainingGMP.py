@@ -1,8 +1,13 @@
+import argparse
 import pygame
 import sys
-import random
-import copy
 from collections import deque
+from maze import Grid, generate_random_grid
+from forward_chaining import compile_knowledge_base, reverse_knowledge_base, step_events, goal_step_events, format_rule
+from events import Push, Goal, log_events
+from state_manager import Journal
+from visualisation import GridRenderer, get_font, render_text, play_trace
+from step_trace import TraceReader, SideView
 
 # Config
 ROWS, COLS = 5, 6
@@ -16,101 +21,41 @@ WINDOW_WIDTH = COLS * CELL_SIZE
 start = (0, 0)
 goal = (4, 5)
 DEFAULT_OBSTACLES = {(0, 1), (2, 1), (3, 1), (2, 3), (3, 4), (4, 4)}
-moves = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 NUM_OBSTACLES = 8
 
-def is_valid(pos, obstacles):
-    r, c = pos
-    return 0 <= r < ROWS and 0 <= c < COLS and pos not in obstacles
-
-def generate_can_move_rules(obstacles):
-    rules = []
-    for r in range(ROWS):
-        for c in range(COLS):
-            from_pos = (r, c)
-            if from_pos in obstacles:
-                continue
-            for move in moves:
-                to_pos = (r + move[0], c + move[1])
-                if is_valid(to_pos, obstacles):
-                    rules.append((from_pos, to_pos))
-    return rules
-
-def apply_gmp_step(facts, agenda, rules, parents, inference_chain):
-    if not agenda:
-        return False, None
-    current = agenda.popleft()
-    for (x, y) in rules:
-        if x == current and y not in facts:
-            facts.add(y)
-            agenda.append(y)
-            parents[y] = x
-            inference_chain.append((x, y))
-            rule_str = f"At{x} ∧ CanMove({x}, {y}) ⇒ At{y}"
-            return True, (y, rule_str)
-    return True, None
-
-def reconstruct_path(parents, goal):
-    path = []
-    node = goal
-    while node is not None:
-        path.append(node)
-        node = parents.get(node)
-    return path[::-1]
-
-def generate_random_obstacles(start, goal, rows, cols, num_obstacles):
-    all_cells = [(r, c) for r in range(rows) for c in range(cols)]
-    all_cells.remove(start)
-    all_cells.remove(goal)
-    while True:
-        obstacles = set(random.sample(all_cells, num_obstacles))
-        if is_solvable(start, goal, obstacles):
-            return obstacles
-
-def is_solvable(start, goal, obstacles):
-    queue = deque([start])
-    visited = {start}
-    while queue:
-        current = queue.popleft()
-        if current == goal:
-            return True
-        for move in moves:
-            neighbor = (current[0] + move[0], current[1] + move[1])
-            if is_valid(neighbor, obstacles) and neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
-    return False
-
-def draw_grid(screen, facts, obstacles, inference_chain, current_rule, found, goal):
-    font = pygame.font.SysFont(None, 26)
-    for r in range(ROWS):
-        for c in range(COLS):
-            pos = (r, c)
-            rect = pygame.Rect(c * CELL_SIZE, r * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            color = (255, 255, 255)
-            if pos in obstacles:
-                color = (0, 0, 0)
-            elif pos == start:
-                color = (0, 255, 0)
-            elif pos == goal:
-                color = (255, 0, 0)
-            elif pos in facts:
-                color = (200, 200, 200)
-            pygame.draw.rect(screen, color, rect)
-            pygame.draw.rect(screen, (0, 0, 0), rect, 1)
-
-    for src, dest in inference_chain:
-        x1, y1 = src[1] * CELL_SIZE + CELL_SIZE // 2, src[0] * CELL_SIZE + CELL_SIZE // 2
-        x2, y2 = dest[1] * CELL_SIZE + CELL_SIZE // 2, dest[0] * CELL_SIZE + CELL_SIZE // 2
-        pygame.draw.line(screen, (128, 0, 128), (x1, y1), (x2, y2), 3)
-
-    # Display inference rule text
+def cell_look(pos, facts, grid, parents, goal, origin=start, wanted=None):
+    color = (255, 255, 255)
+    if grid.is_blocked(pos):
+        color = (0, 0, 0)
+    elif pos == origin:
+        color = (0, 255, 0)
+    elif pos == goal:
+        color = (255, 0, 0)
+    elif pos in facts:
+        color = (200, 200, 200)
+    elif wanted and pos in wanted:
+        color = (255, 225, 170)
+    # Reasoning chain: a purple line from the fact At(x) that derived At(pos); in goal-directed
+    # mode, an orange line from a wanted cell to the cell it is wanted for
+    src = parents.get(pos) if pos in facts else None
+    if src is not None:
+        links = ((src, (128, 0, 128), 3, False),)
+    elif wanted and wanted.get(pos) is not None:
+        links = ((wanted[pos], (230, 140, 40), 3, False),)
+    else:
+        links = ()
+    return color, None, links
+
+def draw_rule(screen, current_rule):
+    # Display inference rule text in the strip between the grid and the buttons
+    rect = pygame.Rect(0, ROWS * CELL_SIZE, WINDOW_WIDTH, 35)
+    screen.fill((230, 230, 230), rect)
     if current_rule:
-        rule_txt = font.render(f"Rule applied: {current_rule}", True, (0, 0, 0))
+        rule_txt = get_font(26).render(f"Rule applied: {current_rule}", True, (0, 0, 0))
         screen.blit(rule_txt, (10, ROWS * CELL_SIZE + 5))
+    return rect
 
 def draw_buttons(screen):
-    font = pygame.font.SysFont(None, 28)
     width = COLS * CELL_SIZE
     top_y = ROWS * CELL_SIZE + 35
     gap = BUTTON_GAP
@@ -125,38 +70,52 @@ def draw_buttons(screen):
     pygame.draw.rect(screen, (100, 100, 200), rand_rect)
     pygame.draw.rect(screen, (100, 60, 180), def_rect)
 
-    screen.blit(font.render("Step", True, (255,255,255)), (step_rect.centerx - 25, step_rect.centery - 10))
-    screen.blit(font.render("Back", True, (255,255,255)), (back_rect.centerx - 25, back_rect.centery - 10))
-    screen.blit(font.render("Randomize", True, (255,255,255)), (rand_rect.centerx - 50, rand_rect.centery - 10))
-    screen.blit(font.render("Default Maze", True, (255,255,255)), (def_rect.centerx - 70, def_rect.centery - 10))
+    screen.blit(render_text("Step", 28, (255,255,255)), (step_rect.centerx - 25, step_rect.centery - 10))
+    screen.blit(render_text("Back", 28, (255,255,255)), (back_rect.centerx - 25, back_rect.centery - 10))
+    screen.blit(render_text("Randomize", 28, (255,255,255)), (rand_rect.centerx - 50, rand_rect.centery - 10))
+    screen.blit(render_text("Default Maze", 28, (255,255,255)), (def_rect.centerx - 70, def_rect.centery - 10))
 
     return step_rect, back_rect, rand_rect, def_rect
 
-def maze_solver_gmp_gui():
+def maze_solver_gmp_gui(goal_directed=False):
     pygame.init()
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("Maze Solver using GMP (Forward Chaining)")
+    pygame.display.set_caption("Maze Solver using GMP (Goal-Directed)" if goal_directed else "Maze Solver using GMP (Forward Chaining)")
     clock = pygame.time.Clock()
 
-    def reset(obstacles):
+    def reset(grid):
+        kb = compile_knowledge_base(grid)  # built once per maze, not on every Step
+        rkb = reverse_knowledge_base(kb) if goal_directed else None
         facts = set([start])
         agenda = deque([start])
         parents = {start: None}
         inference_chain = []
-        history = []
+        # Wanted (magic) cells and their queue; stay empty unless goal-directed
+        wanted = {goal: None} if goal_directed else {}
+        demand = deque([goal]) if goal_directed else deque()
+        history = Journal()
         found = False
         current_rule = None
-        return facts, agenda, parents, inference_chain, history, found, current_rule
+        return kb, rkb, facts, agenda, parents, inference_chain, wanted, demand, history, found, current_rule
 
-    current_obstacles = set(DEFAULT_OBSTACLES)
-    facts, agenda, parents, inference_chain, history, found, current_rule = reset(current_obstacles)
+    def step(history):
+        if goal_directed:
+            return goal_step_events(facts, agenda, wanted, demand, kb, rkb, parents, inference_chain, goal, history)
+        return step_events(facts, agenda, kb, parents, inference_chain, goal, history)
 
-    while True:
-        screen.fill((230, 230, 230))
-        draw_grid(screen, facts, current_obstacles, inference_chain, current_rule, found, goal)
-        step_rect, back_rect, rand_rect, def_rect = draw_buttons(screen)
-        pygame.display.flip()
+    current_grid = Grid(ROWS, COLS, DEFAULT_OBSTACLES)
+    kb, rkb, facts, agenda, parents, inference_chain, wanted, demand, history, found, current_rule = reset(current_grid)
+
+    def look(pos):
+        return cell_look(pos, facts, current_grid, parents, goal, start, wanted)
+
+    renderer = GridRenderer(current_grid.rows, current_grid.cols, look)
+    screen.fill((230, 230, 230))
+    step_rect, back_rect, rand_rect, def_rect = draw_buttons(screen)
+    pygame.display.flip()
+    shown_rule = None
 
+    while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
@@ -164,28 +123,61 @@ def maze_solver_gmp_gui():
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if step_rect.collidepoint(event.pos):
                     if not found:
-                        history.append((copy.deepcopy(facts), copy.deepcopy(agenda),
-                                        copy.deepcopy(parents), copy.deepcopy(inference_chain), current_rule))
-                        can_move_rules = generate_can_move_rules(current_obstacles)
-                        progressed, result = apply_gmp_step(facts, agenda, can_move_rules, parents, inference_chain)
-                        current_rule = result[1] if result else None
-                        if result and result[0] == goal:
-                            found = True
+                        history.begin_step(current_rule)
+                        derived = []
+                        for step_event in log_events(step(history)):
+                            if type(step_event) is Push and step_event.side != "backward":
+                                derived.append((step_event.parent, step_event.node))
+                            elif type(step_event) is Goal:
+                                found = True
+                        current_rule = None
+                        if derived:
+                            current_rule = format_rule(*derived[-1])
+                            if len(derived) > 1:
+                                current_rule += f" (+{len(derived) - 1} more)"
+                        renderer.invalidate(history.last_keys(facts, parents, wanted))
 
                 elif back_rect.collidepoint(event.pos):
                     if history:
-                        facts, agenda, parents, inference_chain, current_rule = history.pop()
+                        renderer.invalidate(history.last_keys(facts, parents, wanted))
+                        current_rule, = history.undo_step()
                         found = goal in facts
 
                 elif rand_rect.collidepoint(event.pos):
-                    current_obstacles = generate_random_obstacles(start, goal, ROWS, COLS, NUM_OBSTACLES)
-                    facts, agenda, parents, inference_chain, history, found, current_rule = reset(current_obstacles)
+                    current_grid = generate_random_grid(start, goal, ROWS, COLS, NUM_OBSTACLES)
+                    kb, rkb, facts, agenda, parents, inference_chain, wanted, demand, history, found, current_rule = reset(current_grid)
+                    renderer = GridRenderer(current_grid.rows, current_grid.cols, look)
 
                 elif def_rect.collidepoint(event.pos):
-                    current_obstacles = set(DEFAULT_OBSTACLES)
-                    facts, agenda, parents, inference_chain, history, found, current_rule = reset(current_obstacles)
-
+                    current_grid = Grid(ROWS, COLS, DEFAULT_OBSTACLES)
+                    kb, rkb, facts, agenda, parents, inference_chain, wanted, demand, history, found, current_rule = reset(current_grid)
+                    renderer = GridRenderer(current_grid.rows, current_grid.cols, look)
+
+        # Repaint only changed cells, and the rule strip only when its text changes
+        dirty = renderer.draw(screen)
+        if current_rule != shown_rule:
+            dirty.append(draw_rule(screen, current_rule))
+            shown_rule = current_rule
+        if dirty:
+            pygame.display.update(dirty)
         clock.tick(60)
 
+def play(base):
+    # Scrub a trace recorded with `python step_trace.py gmp BASE`
+    reader = TraceReader(base)
+
+    def look(pos, state, path):
+        facts = SideView(state, 0, reader.grid.cols)
+        return cell_look(pos, facts, reader.grid, facts, reader.goal, reader.start)
+    play_trace(reader, look, "GMP Trace Playback")
+    reader.close()
+
 if __name__ == "__main__":
-    maze_solver_gmp_gui()
+    parser = argparse.ArgumentParser(description="Maze Solver using GMP (Forward Chaining)")
+    parser.add_argument("--trace", help="play back a recorded step trace instead of searching live")
+    parser.add_argument("--goal-directed", action="store_true", help="derive only facts relevant to At(goal) (magic sets)")
+    args = parser.parse_args()
+    if args.trace:
+        play(args.trace)
+    else:
+        maze_solver_gmp_gui(args.goal_directed)
@@ -0,0 +1,313 @@
+# Forward chaining with Generalized Modus Ponens over At(x) ∧ CanMove(x, y) ⇒ At(y)
+#
+# The goal-directed mode is a meet-in-the-middle search with a demand frontier for the query At(goal).
+# Alongside the plain At rules it derives Wanted facts backward from the goal, as in a magic-sets
+# rewrite:  Wanted(goal).   Wanted(x) ⇐ Wanted(y) ∧ CanMove(x, y).
+# The At rules are NOT guarded by Wanted(y): the full demand set is every cell that can reach the
+# goal, usually the whole component, so the guard would prune nothing. Instead both sides are
+# evaluated semi-naively, one round at a time on whichever has the smaller delta, until a cell is
+# both a fact and wanted; the rules along its demand chain then fire straight through to At(goal).
+# Each side grows a ball around its endpoint, so on open maps this derives far fewer facts than
+# the plain fixpoint but still many that are not on the proof.
+
+from collections import deque
+from a_star import SearchResult
+from bitmap_bfs import bfs_layers
+from events import Expand, Push, Goal
+from instrumentation import phase
+
+def generate_can_move_rules(grid):
+    adjacency = grid.adjacency()
+    rules = []
+    for cell in range(grid.size):
+        if grid.cells[cell]:
+            continue
+        from_pos = grid.position(cell)
+        for neighbor in adjacency.neighbors(cell):
+            rules.append((from_pos, grid.position(neighbor)))
+    return rules
+
+def compile_knowledge_base(grid):
+    # Index CanMove rules by antecedent so a new At(x) fact only touches its own rules
+    kb = {}
+    for x, y in generate_can_move_rules(grid):
+        kb.setdefault(x, []).append(y)
+    return kb
+
+def reverse_knowledge_base(kb):
+    # Index CanMove rules by consequent, for propagating demand back from the goal
+    rkb = {}
+    for x, targets in kb.items():
+        for y in targets:
+            rkb.setdefault(y, []).append(x)
+    return rkb
+
+def format_rule(x, y):
+    return f"At{x} ∧ CanMove({x}, {y}) ⇒ At{y}"
+
+def apply_gmp_step(facts, agenda, kb, parents, inference_chain, journal=None):
+    # Take the next new fact off the agenda and fire every rule it triggers in one pass
+    if not agenda:
+        return False, []
+    x = agenda.popleft() if journal is None else journal.popleft(agenda)
+    derived = []
+    for y in kb.get(x, ()):
+        if y in facts:
+            continue
+        if journal is None:
+            facts.add(y)
+            agenda.append(y)
+            parents[y] = x
+            inference_chain.append((x, y))
+        else:
+            journal.add(facts, y)
+            journal.append(agenda, y)
+            journal.set(parents, y, x)
+            journal.append(inference_chain, (x, y))
+        derived.append((x, y))
+    return True, derived
+
+def step_events(facts, agenda, kb, parents, inference_chain, goal, journal=None):
+    # One GMP step as events: Expand for the fact taken off the agenda, Push per derived fact
+    # (parent = the antecedent), then Goal once At(goal) is derived or the agenda runs dry
+    if agenda:
+        x = agenda[0]
+        _, derived = apply_gmp_step(facts, agenda, kb, parents, inference_chain, journal)
+        yield Expand(x, None)
+        for x, y in derived:
+            yield Push(y, None, x)
+    if goal in facts:
+        path = reconstruct_path(parents, goal)
+        yield Goal(path, len(path) - 1)
+    elif not agenda:
+        yield Goal([], None)
+
+def apply_magic_round(facts, agenda, wanted, demand, kb, rkb, parents, inference_chain, journal=None):
+    # One semi-naive round of the goal-directed program on the side with the smaller delta: every
+    # fact on the agenda fires its At rules, or every cell on the demand queue spreads Wanted to
+    # its predecessors. Returns the side, the (cell, derived) pairs and the meeting cell, if any.
+    forward = len(agenda) <= len(demand)
+    queue, index, known = (agenda, kb, facts) if forward else (demand, rkb, wanted)
+    other = wanted if forward else facts
+    rounds, meet = [], None
+    for _ in range(len(queue)):
+        x = queue.popleft() if journal is None else journal.popleft(queue)
+        derived = []
+        for y in index.get(x, ()):
+            if y in known:
+                continue
+            if forward:
+                if journal is None:
+                    facts.add(y)
+                    parents[y] = x
+                    inference_chain.append((x, y))
+                else:
+                    journal.add(facts, y)
+                    journal.set(parents, y, x)
+                    journal.append(inference_chain, (x, y))
+            elif journal is None:
+                wanted[y] = x
+            else:
+                journal.set(wanted, y, x)
+            if journal is None:
+                queue.append(y)
+            else:
+                journal.append(queue, y)
+            derived.append(y)
+            if y in other:
+                meet = y
+                break
+        rounds.append((x, derived))
+        if meet is not None:
+            break
+    return "forward" if forward else "backward", rounds, meet
+
+def complete_proof(meet, wanted, facts, parents, inference_chain, journal=None):
+    # Fire At rules along the demand chain from a cell that is both a fact and wanted to the goal
+    derived = []
+    x = meet
+    while wanted[x] is not None:
+        y = wanted[x]
+        if journal is None:
+            facts.add(y)
+            parents[y] = x
+            inference_chain.append((x, y))
+        else:
+            journal.add(facts, y)
+            journal.set(parents, y, x)
+            journal.append(inference_chain, (x, y))
+        derived.append((x, y))
+        x = y
+    return derived
+
+def goal_step_events(facts, agenda, wanted, demand, kb, rkb, parents, inference_chain, goal, journal=None):
+    # One goal-directed round as events: Expand per cell taken off its queue and Push per fact
+    # (side "forward") or wanted cell (side "backward", parent = the cell it is wanted for), then
+    # Push for each rule fired along the demand chain, and Goal once At(goal) holds or a side runs dry
+    if goal not in facts and agenda and demand:
+        side, rounds, meet = apply_magic_round(facts, agenda, wanted, demand, kb, rkb, parents, inference_chain, journal)
+        for x, derived in rounds:
+            yield Expand(x, None, side)
+            for y in derived:
+                yield Push(y, None, x, side)
+        if meet is not None:
+            for x, y in complete_proof(meet, wanted, facts, parents, inference_chain, journal):
+                yield Push(y, None, x, "forward")
+    if goal in facts:
+        path = reconstruct_path(parents, goal)
+        yield Goal(path, len(path) - 1)
+    elif not agenda or not demand:
+        yield Goal([], None)
+
+def search_events(grid, start, goal):
+    # Whole inference run as one event stream, ending with a Goal event
+    kb = compile_knowledge_base(grid)
+    facts, agenda, parents, inference_chain = {start}, deque([start]), {start: None}, []
+    while True:
+        for event in step_events(facts, agenda, kb, parents, inference_chain, goal):
+            yield event
+            if type(event) is Goal:
+                return
+
+def forward_chain(kb, start, goal=None, stats=None):
+    # Semi-naive evaluation: each round only joins the facts derived in the previous round,
+    # so every rule fires at most once and the fixpoint costs O(facts + rules)
+    facts = {start}
+    parents = {start: None}
+    inference_chain = []
+    delta = [start]
+    while delta:
+        if stats is not None:
+            stats.sample_frontier(len(delta))
+        new_delta = []
+        for x in delta:
+            rules = kb.get(x, ())
+            if stats is not None:
+                stats.add("expanded")
+                stats.add("rules_scanned", len(rules))
+            for y in rules:
+                if y in facts:
+                    continue
+                facts.add(y)
+                parents[y] = x
+                inference_chain.append((x, y))
+                if y == goal:
+                    if stats is not None:
+                        # The rules after the one that derived the goal were never looked at
+                        stats.add("rules_scanned", rules.index(y) + 1 - len(rules))
+                    return facts, parents, inference_chain
+                new_delta.append(y)
+        delta = new_delta
+    return facts, parents, inference_chain
+
+def goal_directed_chain(kb, rkb, start, goal, stats=None):
+    # Headless meet-in-the-middle evaluation (see the top of the file). Rounds are level-synchronous on
+    # both sides, so the first cell found in both sets lies on a shortest start-goal chain.
+    facts = {start}
+    parents = {start: None}
+    inference_chain = []
+    wanted = {goal: None}
+    delta, demand = [start], [goal]
+    meet = start if start == goal else None
+    while meet is None and delta and demand:
+        forward = len(delta) <= len(demand)
+        current, index, known, other = (delta, kb, facts, wanted) if forward else (demand, rkb, wanted, facts)
+        if stats is not None:
+            stats.sample_frontier(len(delta) + len(demand))
+        new_delta = []
+        for x in current:
+            rules = index.get(x, ())
+            if stats is not None:
+                stats.add("expanded")
+                stats.add("rules_scanned", len(rules))
+            for y in rules:
+                if y in known:
+                    continue
+                if forward:
+                    facts.add(y)
+                    parents[y] = x
+                    inference_chain.append((x, y))
+                else:
+                    wanted[y] = x
+                if y in other:
+                    meet = y
+                    if stats is not None:
+                        stats.add("rules_scanned", rules.index(y) + 1 - len(rules))
+                    break
+                new_delta.append(y)
+            if meet is not None:
+                break
+        if forward:
+            delta = new_delta
+        else:
+            demand = new_delta
+    if meet is not None:
+        complete_proof(meet, wanted, facts, parents, inference_chain)
+    return facts, parents, inference_chain
+
+def fixpoint_rounds(grid, start, goal=None):
+    # Semi-naive round in which each At fact is derived when run to fixpoint (-1 if never), per
+    # cell id. The rounds are exactly BFS layers, so they are computed in bulk on the bitmap.
+    # With a goal, stops after the round that derives At(goal).
+    return bfs_layers(grid, grid.index(start), grid.index(goal) if goal is not None else None)
+
+def fixpoint_path(grid, rounds, goal):
+    # Proof of At(goal) read back off the rounds: each fact was derived from a neighbour one round earlier
+    cell = grid.index(goal)
+    path = [goal]
+    for r in range(rounds[cell] - 1, -1, -1):
+        cell = next(x for x in grid.neighbors(cell) if rounds[x] == r)
+        path.append(grid.position(cell))
+    return path[::-1]
+
+def reconstruct_path(parents, goal):
+    path = []
+    node = goal
+    while node is not None:
+        path.append(node)
+        node = parents.get(node)
+    return path[::-1]
+
+def solve(grid, start, goal, goal_directed=False, fixpoint=False, stats=None):
+    # Headless run to the goal, reported in the same shape as a_star.solve
+    # (expanded = facts derived, pushed = rules fired)
+    if fixpoint:
+        return solve_fixpoint(grid, start, goal, stats)
+    joined = stats["expanded"] if stats is not None else 0
+    with phase(stats, "compile"):
+        kb = compile_knowledge_base(grid)
+        rkb = reverse_knowledge_base(kb) if goal_directed else None
+    with phase(stats, "search"):
+        if goal_directed:
+            facts, parents, inference_chain = goal_directed_chain(kb, rkb, start, goal, stats)
+        else:
+            facts, parents, inference_chain = forward_chain(kb, start, goal, stats)
+    path, cost = [], None
+    if goal in facts:
+        with phase(stats, "path"):
+            path = reconstruct_path(parents, goal)
+        cost = len(path) - 1
+    if stats is not None:
+        stats.add("rules_fired", len(inference_chain))
+        stats.add("pushed", len(inference_chain))
+        stats.add("popped", stats["expanded"] - joined)
+        stats.finish()
+    return SearchResult(path, cost, len(facts), len(inference_chain))
+
+def solve_fixpoint(grid, start, goal, stats=None):
+    # Same answer as solve, but the rounds are derived in bulk by fixpoint_rounds instead of
+    # one rule at a time, so there is no parents / inference_chain trace
+    with phase(stats, "search"):
+        rounds = fixpoint_rounds(grid, start, goal)
+    facts = grid.size - rounds.count(-1)
+    path, cost = [], None
+    if rounds[grid.index(goal)] != -1:
+        with phase(stats, "path"):
+            path = fixpoint_path(grid, rounds, goal)
+        cost = len(path) - 1
+    if stats is not None:
+        stats.add("expanded", facts)
+        stats.add("rules_fired", facts - 1)
+        stats.add("pushed", facts - 1)
+        stats.finish()
+    return SearchResult(path, cost, facts, facts - 1)
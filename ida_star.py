@@ -0,0 +1,122 @@
+# IDA* with a bounded transposition table: A*-optimal paths in memory that does not grow with the map
+#
+# The table holds the best g per cell for the current iteration, at most max_nodes entries: a slot
+# per cell when that covers the grid, else two per bucket (shallowest and latest). Cells pushed out
+# are "forgotten" and searched again if reached again, which costs time without bound.
+
+from array import array
+from collections import namedtuple
+
+from a_star import SearchResult, heuristic
+from instrumentation import phase
+
+# SearchResult plus how many cells could not be remembered and how many bounds were tried
+BoundedResult = namedtuple("BoundedResult", SearchResult._fields + ("forgotten", "iterations"))
+
+
+def solve(grid, start, goal, max_nodes=1 << 20, max_expanded=None, h_fn=None, stats=None):
+    # max_expanded: give up (empty path, cost None) once this many nodes have been expanded
+    start_cell, goal_cell = grid.index(start), grid.index(goal)
+    if h_fn is None:
+        position = grid.position
+
+        def h_fn(cell):
+            return heuristic(position(cell), goal)
+    weights = grid.weights
+    if max_nodes >= grid.size:
+        buckets = grid.size  # a slot per cell: nothing is ever forgotten
+    else:
+        buckets = max_nodes // 2  # two entries per bucket
+    if buckets == grid.size:
+        def bucket(cell):
+            return cell
+    else:
+        def bucket(cell):
+            # Fibonacci hashing, so cells a fixed stride apart (one row, say) do not all collide
+            return (cell * 0x9E3779B1 >> 7) % buckets
+    limit = max_expanded if max_expanded is not None else float("inf")
+    expanded = pushed = forgotten = iterations = 0
+    found = None
+    bound = h_fn(start_cell)
+    with phase(stats, "search"):
+        while found is None and start_cell != goal_cell:
+            iterations += 1
+            deep_keys = array("i", [-1]) * buckets
+            deep_g = array("i", [0]) * buckets
+            if buckets < grid.size:
+                last_keys = array("i", [-1]) * buckets
+                last_g = array("i", [0]) * buckets
+            else:
+                last_keys = None  # a slot per cell needs no second tier
+            next_bound = None
+            path, costs = [start_cell], [0]
+            on_path = {start_cell}
+            # Children are stored by descending h and popped from the end, most promising first
+            stack = [sorted(grid.neighbors(start_cell), key=h_fn, reverse=True)]
+            expanded += 1
+            while stack:
+                children = stack[-1]
+                if not children:
+                    stack.pop()
+                    on_path.discard(path.pop())
+                    costs.pop()
+                    continue
+                cell = children.pop()
+                if cell in on_path:
+                    continue
+                g = costs[-1] + (1 if weights is None else weights[cell])
+                f = g + h_fn(cell)
+                if f > bound:
+                    if next_bound is None or f < next_bound:
+                        next_bound = f
+                    continue
+                if buckets:
+                    b = bucket(cell)
+                    if deep_keys[b] == cell:
+                        if deep_g[b] <= g:
+                            continue
+                        deep_g[b] = g
+                    elif last_keys is None:
+                        deep_keys[b], deep_g[b] = cell, g
+                    elif last_keys[b] == cell:
+                        if last_g[b] <= g:
+                            continue
+                        last_g[b] = g
+                    elif deep_keys[b] == -1 or g <= deep_g[b]:
+                        # The displaced depth-preferred entry moves down to the always-replace slot
+                        if last_keys[b] != -1:
+                            forgotten += 1
+                        last_keys[b], last_g[b] = deep_keys[b], deep_g[b]
+                        deep_keys[b], deep_g[b] = cell, g
+                    else:
+                        if last_keys[b] != -1:
+                            forgotten += 1
+                        last_keys[b], last_g[b] = cell, g
+                else:
+                    forgotten += 1
+                pushed += 1
+                path.append(cell)
+                if cell == goal_cell:
+                    found = g
+                    break
+                costs.append(g)
+                on_path.add(cell)
+                stack.append(sorted(grid.neighbors(cell), key=h_fn, reverse=True))
+                expanded += 1
+                if stats is not None:
+                    stats.sample_frontier(sum(map(len, stack)))
+                if expanded >= limit:
+                    break
+            if expanded >= limit or next_bound is None:
+                break  # out of budget, or every reachable cell fits under the bound (goal unreachable)
+            bound = next_bound
+    if start_cell == goal_cell:
+        path, found = [start_cell], 0
+    if stats is not None:
+        stats.add("expanded", expanded)
+        stats.add("pushed", pushed)
+        stats.add("forgotten", forgotten)
+        stats.finish()
+    if found is None:
+        return BoundedResult([], None, expanded, pushed, forgotten, iterations)
+    return BoundedResult([grid.position(cell) for cell in path], found, expanded, pushed, forgotten, iterations)
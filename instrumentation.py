@@ -0,0 +1,72 @@
+# Search instrumentation: counters and per-phase timers shared by the headless solvers
+#
+# Solvers take stats=None and leave their inner loops untouched. Counters that can be recovered
+# from the finished search (pops, stale pops, re-openings) are derived once at the end, and only
+# peak frontier size is sampled per expansion, behind a single `stats is not None` check.
+
+import json
+import time
+from contextlib import contextmanager
+
+COUNTERS = ("expanded", "pushed", "popped", "stale_pops", "reopened", "rules_scanned", "rules_fired", "peak_frontier",
+            "forgotten")
+
+
+class SearchStats:
+    def __init__(self, on_finish=None):
+        # on_finish(dict) is called by finish() when the solver returns
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timers = {}
+        self.on_finish = on_finish
+
+    def __getitem__(self, name):
+        return self.counters[name]
+
+    def __setitem__(self, name, value):
+        self.counters[name] = value
+
+    def add(self, name, amount=1):
+        self.counters[name] += amount
+
+    def sample_frontier(self, size):
+        if size > self.counters["peak_frontier"]:
+            self.counters["peak_frontier"] = size
+
+    def tally(self, expanded, pushed, remaining, reached):
+        # Fill in the queue counters of a finished search: every push was either popped or is
+        # still queued, every pop either expanded or was stale, and every push beyond the first
+        # one per reached node re-opened a node at a lower cost
+        self.add("expanded", expanded)
+        self.add("pushed", pushed)
+        self.add("popped", pushed - remaining)
+        self.add("stale_pops", pushed - remaining - expanded)
+        self.add("reopened", pushed - reached)
+
+    @contextmanager
+    def phase(self, name):
+        # Accumulates wall time per phase name (init, search, path, compile, ...)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0.0) + time.perf_counter() - t0
+
+    def as_dict(self):
+        return {"counters": dict(self.counters), "timers": dict(self.timers)}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def finish(self):
+        if self.on_finish is not None:
+            self.on_finish(self.as_dict())
+
+
+@contextmanager
+def phase(stats, name):
+    # stats.phase(name), or a no-op when instrumentation is off
+    if stats is None:
+        yield
+    else:
+        with stats.phase(name):
+            yield
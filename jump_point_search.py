@@ -0,0 +1,181 @@
+# Jump Point Search for the uniform-cost 4-connected grid
+#
+# Canonical paths take vertical moves as early as possible. A horizontal run only stops where a
+# vertical turn is forced (the free cell above/below has a blocked cell diagonally behind it),
+# and a vertical run stops wherever a horizontal scan from it reaches a jump point or the goal.
+#
+# Every vertical step probes both horizontal directions, so walking the row cell by cell would
+# make one vertical jump cost O(rows x cols). Instead each row touched is turned once into
+# int bitsets (walls, and the cells where a run going left or right is forced to stop), and a
+# horizontal jump is a lowest / highest set-bit lookup on them.
+
+import heapq
+from itertools import count
+from a_star import heuristic, SearchResult
+from instrumentation import phase
+from maze import BLOCKED_DIGITS
+
+
+class _RowScanner:
+    # Per-search cache of row bitsets (bit c = column c) for horizontal jumps
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.goal = goal
+        self.full = (1 << grid.cols) - 1
+        self.blocked_rows = {}
+        self.stops = {}
+
+    def _blocked(self, r):
+        if not 0 <= r < self.grid.rows:
+            return self.full  # rows off the map never force a turn
+        bits = self.blocked_rows.get(r)
+        if bits is None:
+            cols = self.grid.cols
+            row = bytes(self.grid.cells[r * cols:(r + 1) * cols])
+            bits = self.blocked_rows[r] = int(row.translate(BLOCKED_DIGITS)[::-1], 2)
+        return bits
+
+    def _stops(self, r, dc):
+        # Walls of row r, and the free cells where a run moving dc stops: the goal, and cells whose
+        # free neighbour above or below has a blocked cell diagonally behind it
+        key = (r, dc)
+        entry = self.stops.get(key)
+        if entry is None:
+            full = self.full
+            walls = self._blocked(r)
+            forced = 0
+            for rr in (r - 1, r + 1):
+                blocked = self._blocked(rr)
+                behind = blocked << 1 if dc > 0 else blocked >> 1
+                forced |= ~blocked & behind
+            if self.goal[0] == r:
+                forced |= 1 << self.goal[1]
+            entry = self.stops[key] = (walls, forced & ~walls & full)
+        return entry
+
+    def jump_horizontal(self, r, c, dc):
+        walls, stops = self._stops(r, dc)
+        if dc > 0:
+            ahead = stops >> (c + 1)
+            if not ahead:
+                return None
+            stop = (ahead & -ahead).bit_length() + c
+            wall = walls >> (c + 1)
+            if wall and (wall & -wall).bit_length() + c < stop:
+                return None
+            return stop
+        behind = (1 << c) - 1
+        stop = (stops & behind).bit_length() - 1
+        if stop < 0 or (walls & behind).bit_length() - 1 > stop:
+            return None
+        return stop
+
+    def jump_vertical(self, r, c, dr):
+        rows, cols, cells = self.grid.rows, self.grid.cols, self.grid.cells
+        while True:
+            r += dr
+            if r < 0 or r >= rows or cells[r * cols + c]:
+                return None
+            if (r, c) == self.goal:
+                return r
+            if self.jump_horizontal(r, c, -1) is not None or self.jump_horizontal(r, c, 1) is not None:
+                return r
+
+def _directions(grid, position, parent):
+    # Pruned directions: everything from the start, otherwise natural plus forced neighbours
+    if parent is None:
+        return [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    r, c = position
+    pr, pc = parent
+    if r == pr:
+        dc = 1 if c > pc else -1
+        directions = [(0, dc)]
+        rows, cols, cells = grid.rows, grid.cols, grid.cells
+        for dr in (-1, 1):
+            rr = r + dr
+            if 0 <= rr < rows and not cells[rr * cols + c] and cells[rr * cols + c - dc]:
+                directions.append((dr, 0))
+        return directions
+    dr = 1 if r > pr else -1
+    return [(dr, 0), (0, -1), (0, 1)]
+
+def jump_successors(grid, position, parent, goal, scanner=None):
+    if scanner is None:
+        scanner = _RowScanner(grid, goal)
+    r, c = position
+    successors = []
+    for dr, dc in _directions(grid, position, parent):
+        if dr:
+            jr = scanner.jump_vertical(r, c, dr)
+            if jr is not None:
+                successors.append((jr, c))
+        else:
+            jc = scanner.jump_horizontal(r, c, dc)
+            if jc is not None:
+                successors.append((r, jc))
+    return successors
+
+def expand_jump_path(jump_points):
+    # Fill in the straight runs between consecutive jump points to get a full cell-by-cell path
+    if not jump_points:
+        return []
+    path = [jump_points[0]]
+    for (r1, c1) in jump_points[1:]:
+        r0, c0 = path[-1]
+        dr = (r1 > r0) - (r1 < r0)
+        dc = (c1 > c0) - (c1 < c0)
+        while (r0, c0) != (r1, c1):
+            r0, c0 = r0 + dr, c0 + dc
+            path.append((r0, c0))
+    return path
+
+def solve(grid, start, goal, stats=None):
+    # A* over jump points, with the same (f, h, counter, position) open entries as a_star
+    if grid.weights is not None:
+        # Jumping over a run assumes every step costs the same
+        raise ValueError("jump point search needs a uniform-cost grid")
+    h = heuristic(start, goal)
+    open_set = [(h, h, 0, start)]
+    counter = count(1)
+    best_g = {start: 0}
+    parents = {start: None}
+    closed = set()
+    scanner = _RowScanner(grid, goal)
+    expanded = 0
+    pushed = 1
+    found = None
+    with phase(stats, "search"):
+        while open_set:
+            f, h, _, position = heapq.heappop(open_set)
+            if position in closed:
+                continue
+            closed.add(position)
+            expanded += 1
+            g = f - h
+            if position == goal:
+                found = g
+                break
+            for successor in jump_successors(grid, position, parents[position], goal, scanner):
+                if successor in closed:
+                    continue
+                tentative_g = g + heuristic(position, successor)
+                if successor not in best_g or tentative_g < best_g[successor]:
+                    best_g[successor] = tentative_g
+                    parents[successor] = position
+                    successor_h = heuristic(successor, goal)
+                    heapq.heappush(open_set, (tentative_g + successor_h, successor_h, next(counter), successor))
+                    pushed += 1
+            if stats is not None:
+                stats.sample_frontier(len(open_set))
+    path = []
+    if found is not None:
+        with phase(stats, "path"):
+            jump_points = []
+            while position is not None:
+                jump_points.append(position)
+                position = parents[position]
+            path = expand_jump_path(jump_points[::-1])
+    if stats is not None:
+        stats.tally(expanded, pushed, len(open_set), len(best_g))
+        stats.finish()
+    return SearchResult(path, found, expanded, pushed)
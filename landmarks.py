@@ -0,0 +1,175 @@
+# ALT heuristic: A* with landmarks and triangle-inequality lower bounds
+#
+# k landmarks are picked by farthest-point selection and a distance array is built from each one.
+# For any landmark L, d(v, t) >= d(L, t) - d(L, v), and on unit-cost grids (where distances are
+# symmetric) also d(v, t) >= d(L, v) - d(L, t). The tables depend only on the maze, so they are
+# saved to disk under a hash of the maze and reused by later runs and queries.
+
+import hashlib
+import heapq
+import os
+import random
+import struct
+from array import array
+from collections import deque
+
+from a_star import UNSEEN, solve as a_star_solve
+from instrumentation import phase
+
+DEFAULT_CACHE_DIR = ".alt_cache"
+_MAGIC = b"ALT1"
+_loaded = {}  # (maze key, k) -> LandmarkTable, so repeated queries in one process skip the disk
+_MAX_LOADED = 16
+
+
+def maze_key(grid):
+    digest = hashlib.sha256(struct.pack("<II", grid.rows, grid.cols))
+    digest.update(grid.cells)
+    if grid.weights is not None:
+        digest.update(grid.weights)
+    return digest.hexdigest()[:32]
+
+def distances_from(grid, source):
+    # Cost from source to every cell (UNSEEN where unreachable): BFS, or Dijkstra on weighted grids
+    weights = grid.weights
+    dist = array("i", [UNSEEN]) * grid.size
+    dist[source] = 0
+    if weights is None:
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            d = dist[cell] + 1
+            for neighbor in grid.neighbors(cell):
+                if dist[neighbor] == UNSEEN:
+                    dist[neighbor] = d
+                    queue.append(neighbor)
+        return dist
+    heap = [(0, source)]
+    while heap:
+        d, cell = heapq.heappop(heap)
+        if d != dist[cell]:
+            continue
+        for neighbor in grid.neighbors(cell):
+            nd = d + weights[neighbor]
+            if dist[neighbor] == UNSEEN or nd < dist[neighbor]:
+                dist[neighbor] = nd
+                heapq.heappush(heap, (nd, neighbor))
+    return dist
+
+def select_landmarks(grid, k, seed=0):
+    # Farthest-point selection: each landmark is the cell farthest from all landmarks chosen so far.
+    # Every table is a whole-grid search, so compile the CSR adjacency up front.
+    grid.adjacency()
+    free = [cell for cell in range(grid.size) if not grid.cells[cell]]
+    if not free:
+        return [], []
+    rng = random.Random(seed)
+    seed_dist = distances_from(grid, rng.choice(free))
+    nearest = array("i", [UNSEEN]) * grid.size
+    for cell in free:
+        if seed_dist[cell] != UNSEEN:
+            nearest[cell] = seed_dist[cell]
+    landmarks, tables = [], []
+    for _ in range(k):
+        landmark = max(range(grid.size), key=nearest.__getitem__)
+        if nearest[landmark] <= 0:
+            break
+        dist = distances_from(grid, landmark)
+        landmarks.append(landmark)
+        tables.append(dist)
+        for cell in free:
+            if dist[cell] != UNSEEN and dist[cell] < nearest[cell]:
+                nearest[cell] = dist[cell]
+    return landmarks, tables
+
+
+class LandmarkTable:
+    def __init__(self, grid, landmarks, tables):
+        self.grid = grid
+        self.landmarks = landmarks
+        self.tables = tables
+
+    @classmethod
+    def build(cls, grid, k, seed=0):
+        landmarks, tables = select_landmarks(grid, k, seed)
+        return cls(grid, landmarks, tables)
+
+    def save(self, path):
+        # Header (magic, landmark count, cell count), landmark cell ids, then one int32 table each
+        tmp = f"{path}.{os.getpid()}.tmp"  # per process: batch workers may build the same table at once
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC + struct.pack("<II", len(self.landmarks), self.grid.size))
+            array("i", self.landmarks).tofile(f)
+            for table in self.tables:
+                table.tofile(f)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    @classmethod
+    def load(cls, grid, path):
+        with open(path, "rb") as f:
+            header = f.read(len(_MAGIC) + 8)
+            if len(header) < len(_MAGIC) + 8 or header[:len(_MAGIC)] != _MAGIC:
+                raise ValueError(f"{path} is not a landmark table")
+            count, size = struct.unpack("<II", header[len(_MAGIC):])
+            if size != grid.size:
+                raise ValueError(f"{path} was built for a different maze")
+            landmarks = array("i")
+            landmarks.fromfile(f, count)
+            tables = []
+            for _ in range(count):
+                table = array("i")
+                table.fromfile(f, size)
+                tables.append(table)
+        return cls(grid, list(landmarks), tables)
+
+    def heuristic(self, goal):
+        # h(cell) for one goal: the best landmark bound, never below Manhattan distance
+        cols = self.grid.cols
+        goal_cell = goal[0] * cols + goal[1]
+        goal_r, goal_c = goal
+        symmetric = self.grid.weights is None
+        bounds = [(table, table[goal_cell]) for table in self.tables if table[goal_cell] != UNSEEN]
+
+        def h(cell):
+            r, c = divmod(cell, cols)
+            best = abs(r - goal_r) + abs(c - goal_c)
+            for table, to_goal in bounds:
+                d = table[cell]
+                if d == UNSEEN:
+                    continue
+                bound = to_goal - d
+                if symmetric and -bound > bound:
+                    bound = -bound
+                if bound > best:
+                    best = bound
+            return best
+        return h
+
+
+def load_landmarks(grid, k=8, cache_dir=DEFAULT_CACHE_DIR):
+    # Landmark table for this maze: from memory, else from the disk cache, else built and saved
+    key = maze_key(grid)
+    table = _loaded.get((key, k))
+    if table is not None:
+        return table
+    path = os.path.join(cache_dir, f"{key}-{k}.alt") if cache_dir else None
+    table = None
+    if path and os.path.exists(path):
+        try:
+            table = LandmarkTable.load(grid, path)
+        except (OSError, EOFError, ValueError):
+            table = None  # unreadable or stale cache file: rebuild and overwrite it
+    if table is None:
+        table = LandmarkTable.build(grid, k)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            table.save(path)
+    if len(_loaded) >= _MAX_LOADED:
+        _loaded.clear()
+    _loaded[(key, k)] = table
+    return table
+
+def solve(grid, start, goal, k=8, cache_dir=DEFAULT_CACHE_DIR, stats=None):
+    with phase(stats, "landmarks"):
+        table = load_landmarks(grid, k, cache_dir)
+    return a_star_solve(grid, start, goal, h_fn=table.heuristic(goal), stats=stats)
@@ -0,0 +1,131 @@
+# Lifelong Planning A* (incremental replanning when obstacles change)
+#
+# Keeps g and rhs (one-step lookahead) arrays between plans. When cells become blocked or free,
+# only those cells and their neighbours are re-queued, and the search repairs the values that
+# actually changed instead of starting over. Start and goal stay fixed, which is the case where
+# D* Lite reduces to LPA*.
+
+import heapq
+from array import array
+from itertools import count
+from a_star import heuristic, SearchResult
+
+INF = 2 ** 31 - 1  # g / rhs value for cells with no known path from the start
+
+
+class LPAStar:
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.start = grid.index(start)
+        self.goal = grid.index(goal)
+        self.goal_pos = goal
+        self.g = array("i", [INF]) * grid.size
+        self.rhs = array("i", [INF]) * grid.size
+        self.open_set = []  # (k1, k2, counter, cell) entries; stale ones are skipped on pop
+        self.counter = count()
+        self.pushed = 0
+        if not grid.cells[self.start]:
+            self.rhs[self.start] = 0
+            self._push(self.start)
+
+    def _key(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        if best == INF:
+            return INF, INF
+        r, c = divmod(cell, self.grid.cols)
+        return best + heuristic((r, c), self.goal_pos), best
+
+    def _push(self, cell):
+        k1, k2 = self._key(cell)
+        heapq.heappush(self.open_set, (k1, k2, next(self.counter), cell))
+        self.pushed += 1
+
+    def _update_cell(self, cell):
+        # Recompute rhs from the free neighbours and queue the cell if it is now inconsistent
+        g, rhs, weights = self.g, self.rhs, self.grid.weights
+        if cell != self.start:
+            best = INF
+            if not self.grid.cells[cell]:
+                for neighbor in self.grid.neighbors(cell):
+                    if g[neighbor] < best:
+                        best = g[neighbor]
+                if best != INF:
+                    best += 1 if weights is None else weights[cell]
+            rhs[cell] = best
+        if g[cell] != rhs[cell]:
+            self._push(cell)
+
+    def _top_key(self):
+        # Drop consistent and outdated entries so the heap top is a live key
+        open_set = self.open_set
+        while open_set:
+            k1, k2, _, cell = open_set[0]
+            if self.g[cell] != self.rhs[cell] and (k1, k2) == self._key(cell):
+                return k1, k2
+            heapq.heappop(open_set)
+        return INF, INF
+
+    def compute_shortest_path(self):
+        # Process inconsistent cells until the goal is consistent and nothing cheaper is queued.
+        # Returns the number of cells expanded.
+        g, rhs, goal = self.g, self.rhs, self.goal
+        expanded = 0
+        while self._top_key() < self._key(goal) or rhs[goal] != g[goal]:
+            if not self.open_set:
+                break
+            cell = heapq.heappop(self.open_set)[3]
+            expanded += 1
+            if g[cell] > rhs[cell]:
+                # Overconsistent: settle the cheaper cost and let the neighbours pick it up
+                g[cell] = rhs[cell]
+            else:
+                # Underconsistent: the old cost is gone, so re-derive this cell and its neighbours
+                g[cell] = INF
+                self._update_cell(cell)
+            for neighbor in self.grid.neighbors(cell):
+                self._update_cell(neighbor)
+        return expanded
+
+    def update_cells(self, changes):
+        # changes: iterable of (position, blocked) pairs for cells whose occupancy flipped
+        grid = self.grid
+        changes = list(changes)
+        for position, blocked in changes:
+            grid.set_blocked(position, blocked)
+        for position, _ in changes:
+            cell = grid.index(position)
+            if cell == self.start:
+                # _update_cell never recomputes the start's rhs: it is 0 while free, INF while blocked
+                self.rhs[cell] = INF if grid.cells[cell] else 0
+            self._update_cell(cell)
+            for neighbor in grid.neighbors(cell):
+                self._update_cell(neighbor)
+
+    def path(self):
+        # Walk back from the goal, always to the neighbour with the lowest g (the one rhs came from)
+        g, goal = self.g, self.goal
+        if g[goal] == INF:
+            return []
+        grid = self.grid
+        cell = goal
+        path = [grid.position(cell)]
+        while cell != self.start:
+            cell = min(grid.neighbors(cell), key=g.__getitem__)
+            path.append(grid.position(cell))
+        return path[::-1]
+
+    def replan(self, changes=()):
+        # Apply obstacle changes and repair the plan; expanded and pushed count only this repair
+        pushed = self.pushed
+        self.update_cells(changes)
+        expanded = self.compute_shortest_path()
+        pushed = self.pushed - pushed
+        cost = self.g[self.goal]
+        if cost == INF:
+            return SearchResult([], None, expanded, pushed)
+        return SearchResult(self.path(), cost, expanded, pushed)
+
+
+def solve(grid, start, goal):
+    # One-shot plan on a private copy of the grid, so later update_cells calls don't touch the caller's
+    return LPAStar(grid.copy(), start, goal).replan()
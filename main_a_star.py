@@ -1,62 +1,78 @@
 # Main loop: setup, Pygame window, event handling
 
+import argparse
 import pygame
 import sys
-import heapq
 
 from constants import ROWS, COLS, CELL_SIZE, WINDOW_HEIGHT, start, goal, NUM_OBSTACLES, DEFAULT_OBSTACLES
-from maze import generate_random_obstacles
-from a_star import Node, heuristic, reconstruct_path, expand_node, print_path, print_frontier
-from visualisation import draw_grid, draw_buttons, draw_candidate_arrows
-from state_manager import save_state, load_previous_state
+from maze import Grid, generate_random_grid
+from a_star import init_search, reconstruct_path, step_events
+from events import Expand, Goal, log_events
+from instrumentation import SearchStats
+from visualisation import GridRenderer, a_star_cell_look, candidate_arrows, draw_buttons, play_trace
+from state_manager import Journal
+from step_trace import TraceReader
 
 
-def reset_all(obstacles):
+def reset_all(grid):
     # Initialize/reset all data structures for a new search session
-    open_set = []  # priority queue for nodes to explore
-    start_node = Node(start, 0, heuristic(start, goal))
-    heapq.heappush(open_set, start_node)
-    visited = set()  # set of visited nodes
-    parents = {start: None}  # parent links for reconstructing path
-    open_dict = {start: 0}  # dictionary for quick cost lookup
+    # (open list entries, g and parent arrays, closed bitmap, tie-break counter)
+    open_set, g, parent, closed, counter = init_search(grid, start, goal)
+    stats = SearchStats()  # counters for the window title (nodes expanded so far)
     found = False  # goal not found yet
     final_path = []  # solution path
-    current_node = None  # node currently being expanded
-    history = []  # history for backtracking
-    save_state(open_set, visited, current_node, parents, open_dict, found, final_path, history)
-    return open_set, visited, current_node, parents, open_dict, found, final_path, history
+    current_cell = None  # cell currently being expanded
+    history = Journal()  # per-step undo journal for backtracking
+    return open_set, g, parent, closed, counter, stats, current_cell, found, final_path, history
 
 
 def main():
     pygame.init()
     # Set up Pygame screen
     screen = pygame.display.set_mode((COLS * CELL_SIZE, WINDOW_HEIGHT))
-    pygame.display.set_caption("A* Algorithm Visualization")
     clock = pygame.time.Clock()
 
-    # Create initial obstacles
-    obstacles = generate_random_obstacles(start, goal, ROWS, COLS, NUM_OBSTACLES)
-    print("Obstacles:", obstacles)
+    # Create initial maze
+    grid = generate_random_grid(start, goal, ROWS, COLS, NUM_OBSTACLES)
+    print("Obstacles:", grid.obstacles())
 
     # Initialize search structures
-    open_set, visited, current_node, parents, open_dict, found, final_path, history = reset_all(obstacles)
+    open_set, g, parent, closed, counter, stats, current_cell, found, final_path, history = reset_all(grid)
+    path_cells = set()  # cells of the path currently highlighted
 
-    running = True
-    while running:
-        screen.fill((220, 220, 220))  # Background color
-
-        # Decide which path to draw: current path or final path
-        current_display_path = reconstruct_path(current_node) if current_node and not found else final_path
+    def show_status():
+        pygame.display.set_caption(f"A* Algorithm Visualization - {stats['expanded']} nodes expanded")
 
-        draw_grid(screen, visited, current_display_path, parents, obstacles, open_dict)
+    def look(pos):
+        return a_star_cell_look(pos, grid, closed, parent, g, path_cells)
 
+    def refresh(cells):
+        # Mark the cells a step (or undo) touched, plus path and candidate-arrow changes, for repaint
+        nonlocal path_cells
+        # Decide which path to draw: current path or final path
+        if current_cell is not None and not found:
+            new_path = set(reconstruct_path(parent, current_cell, grid))
+        else:
+            new_path = set(final_path)
+        renderer.invalidate(path_cells ^ new_path)
+        path_cells = new_path
+        renderer.invalidate(grid.position(cell) for cell in cells)
         # Draw arrows to show available moves from current node
-        if current_node and not found:
-            draw_candidate_arrows(screen, current_node.position, visited, obstacles)
+        if current_cell is not None and not found:
+            renderer.set_overlay(candidate_arrows(grid.position(current_cell), closed, grid))
+        else:
+            renderer.set_overlay([])
+
+    renderer = GridRenderer(grid.rows, grid.cols, look)
+    show_status()
 
-        # Draw control buttons
-        step_rect, back_rect, rand_rect, def_rect = draw_buttons(screen)
+    # Background and control buttons are static, so they are drawn once
+    screen.fill((220, 220, 220))
+    step_rect, back_rect, rand_rect, def_rect = draw_buttons(screen)
+    pygame.display.flip()
 
+    running = True
+    while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False  # Exit loop on window close
@@ -64,61 +80,72 @@ def main():
                 # Handle Step button (advance one step)
                 if step_rect.collidepoint(event.pos):
                     if open_set and not found:
-                        save_state(open_set, visited, current_node, parents, open_dict, found, final_path, history)
-
-                        # Pop the lowest-f-cost node from the open set
-                        current_node = heapq.heappop(open_set)
-                        open_dict.pop(current_node.position, None)
-                        print(f"\nExpanding node: {current_node.position}")
-                        print_frontier(open_dict)
-                        print_path("Current path", reconstruct_path(current_node))
-                        print(f"Total nodes expanded: {len(visited) + 1}")
-
-                        # Check if goal reached
-                        if current_node.position == goal:
-                            final_path = reconstruct_path(current_node)
-                            found = True
-                            print("\n--- Goal reached! ---")
-                            print_path("Solution path", final_path)
-                            print(f"Total nodes expanded: {len(visited) + 1}")
-                            print("Final frontier (open set):", list(open_dict.keys()))
-
-                        # Expand the current node (add neighbors to open set)
-                        if current_node.position not in visited:
-                            new_frontier = expand_node(current_node, open_set, visited, parents, open_dict, obstacles,
-                                                       goal)
-                            print("New frontier nodes added:", new_frontier)
+                        history.begin_step(current_cell, found, final_path)
+
+                        # Pop the lowest-f-cost node and expand it, logging each step event to the console
+                        for step_event in log_events(step_events(open_set, g, parent, closed, counter, grid, goal, history)):
+                            if type(step_event) is Expand:
+                                current_cell = grid.index(step_event.node)
+                                history.set(stats.counters, "expanded", stats["expanded"] + 1)
+                            elif type(step_event) is Goal:
+                                final_path = step_event.path
+                                found = True
+                        refresh(history.last_keys(g, parent, closed))
+                        show_status()
 
                 # Handle Back button (undo last step)
                 if back_rect.collidepoint(event.pos):
-                    if len(history) > 1:
-                        open_set, visited, current_node, parents, open_dict, found, final_path = load_previous_state(history)
+                    if len(history) > 0:
+                        touched = history.last_keys(g, parent, closed)
+                        current_cell, found, final_path = history.undo_step()
+                        refresh(touched)
+                        show_status()
                         print("\n--- Went back one step ---")
-                        print_frontier(open_dict)
-                        if current_node:
-                            print_path("Current path", reconstruct_path(current_node))
-                        else:
-                            print_path("Current path", [])
 
                 # Handle Randomize Maze button
                 if rand_rect.collidepoint(event.pos):
-                    obstacles = generate_random_obstacles(start, goal, ROWS, COLS, NUM_OBSTACLES)
-                    print("Randomized obstacles:", obstacles)
-                    open_set, visited, current_node, parents, open_dict, found, final_path, history = reset_all(obstacles)
+                    grid = generate_random_grid(start, goal, ROWS, COLS, NUM_OBSTACLES)
+                    print("Randomized obstacles:", grid.obstacles())
+                    open_set, g, parent, closed, counter, stats, current_cell, found, final_path, history = reset_all(grid)
+                    path_cells = set()
+                    renderer = GridRenderer(grid.rows, grid.cols, look)
+                    show_status()
 
                 # Handle Default Maze button
                 if def_rect.collidepoint(event.pos):
-                    obstacles = set(DEFAULT_OBSTACLES)
-                    print("Default maze loaded:", obstacles)
-                    open_set, visited, current_node, parents, open_dict, found, final_path, history = reset_all(obstacles)
-
-        # Refresh the screen
-        pygame.display.update()
+                    grid = Grid(ROWS, COLS, DEFAULT_OBSTACLES)
+                    print("Default maze loaded:", grid.obstacles())
+                    open_set, g, parent, closed, counter, stats, current_cell, found, final_path, history = reset_all(grid)
+                    path_cells = set()
+                    renderer = GridRenderer(grid.rows, grid.cols, look)
+                    show_status()
+
+        # Repaint only what changed since the last frame
+        dirty = renderer.draw(screen)
+        if dirty:
+            pygame.display.update(dirty)
         clock.tick(60)  # Limit to 60 FPS
 
     pygame.quit()
     sys.exit()
 
 
+def play(base):
+    # Scrub a trace recorded with `python step_trace.py astar BASE`
+    reader = TraceReader(base)
+
+    def look(pos, state, path):
+        return a_star_cell_look(pos, reader.grid, state.expanded[0], state.parent[0], state.cost[0], path,
+                                (reader.start, reader.goal))
+    play_trace(reader, look, "A* Trace Playback", partial_paths=True)
+    reader.close()
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="A* Algorithm Visualization")
+    parser.add_argument("--trace", help="play back a recorded step trace instead of searching live")
+    args = parser.parse_args()
+    if args.trace:
+        play(args.trace)
+    else:
+        main()
@@ -1,37 +1,251 @@
 # Maze generation, solvability checking
 
 import random
+from array import array
 from collections import deque
-from constants import moves
 
-def is_valid(pos, rows, cols, obstacles):
+from adjacency import Adjacency
+from bitmap_bfs import reachable
+
+BLOCKED_DIGITS = bytes([0x30] + [0x31] * 255)  # occupancy byte -> "1" if blocked, for bytes.translate
+_MASK = (1 << 64) - 1
+_zobrist_keys = array("Q")
+_zobrist_rng = random.Random(0x5A0B)  # fixed seed: hashes must agree across processes and runs
+
+def _zobrist_table(size):
+    # One random 64-bit key per cell id, shared by every grid and grown on demand
+    if len(_zobrist_keys) < size:
+        _zobrist_keys.extend(_zobrist_rng.getrandbits(64) for _ in range(size - len(_zobrist_keys)))
+    return _zobrist_keys
+
+def _weight_key(key, weight):
+    # splitmix64 finalizer over (cell key + weight); weight 1 is the default and hashes to nothing
+    if weight == 1:
+        return 0
+    x = (key + weight * 0x9E3779B97F4A7C15) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+class Grid:
+    # Occupancy bitmap (one byte per cell, 1 = obstacle) addressed by flat cell ids r * cols + c.
+    # Optional terrain weights (one byte per cell, 1-255) give the cost of stepping into a cell;
+    # weights stays None for the usual unit-cost maze.
+    # zobrist is the XOR of per-cell keys over obstacles (and non-unit weights). It is computed on
+    # first use and then kept current by set_blocked / set_weight, so edits after that must go
+    # through those methods rather than writing cells directly. The same goes for the CSR adjacency
+    # compiled by adjacency(): set_blocked drops it and neighbors() falls back to scanning.
+    def __init__(self, rows, cols, obstacles=()):
+        self.rows = rows
+        self.cols = cols
+        self.cells = bytearray(rows * cols)
+        self.weights = None
+        self._zobrist = None
+        self._adjacency = None
+        for r, c in obstacles:
+            self.cells[r * cols + c] = 1
+
+    @classmethod
+    def from_bytes(cls, rows, cols, data, weights=None):
+        grid = cls(rows, cols)
+        grid.cells[:] = data
+        if weights is not None:
+            grid.weights = bytearray(weights)
+        return grid
+
+    @classmethod
+    def from_buffer(cls, rows, cols, cells, weights=None):
+        # Wrap existing writable buffers (e.g. views into a memory-mapped maze file) without copying
+        grid = cls(0, 0)
+        grid.rows = rows
+        grid.cols = cols
+        grid.cells = cells
+        grid.weights = weights
+        return grid
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def index(self, pos):
+        return pos[0] * self.cols + pos[1]
+
+    def position(self, cell):
+        return divmod(cell, self.cols)
+
+    def is_blocked(self, pos):
+        return self.cells[pos[0] * self.cols + pos[1]] == 1
+
+    def set_blocked(self, pos, blocked=True):
+        cell = pos[0] * self.cols + pos[1]
+        value = 1 if blocked else 0
+        if self.cells[cell] != value:
+            self.cells[cell] = value
+            self._adjacency = None
+            if self._zobrist is not None:
+                self._zobrist ^= _zobrist_table(self.size)[cell]
+
+    def set_weight(self, pos, weight):
+        if not 1 <= weight <= 255:
+            raise ValueError(f"terrain weight must be between 1 and 255, got {weight}")
+        if self.weights is None:
+            self.weights = bytearray(b"\x01") * self.size
+        cell = pos[0] * self.cols + pos[1]
+        if self._zobrist is not None:
+            key = _zobrist_table(self.size)[cell]
+            self._zobrist ^= _weight_key(key, self.weights[cell]) ^ _weight_key(key, weight)
+        self.weights[cell] = weight
+
+    @property
+    def zobrist(self):
+        if self._zobrist is None:
+            keys = _zobrist_table(self.size)
+            h = 0
+            for cell, blocked in enumerate(self.cells):
+                if blocked:
+                    h ^= keys[cell]
+            if self.weights is not None:
+                for cell, weight in enumerate(self.weights):
+                    if weight != 1:
+                        h ^= _weight_key(keys[cell], weight)
+            self._zobrist = h
+        return self._zobrist
+
+    def max_weight(self):
+        return max(self.weights) if self.weights is not None else 1
+
+    def adjacency(self):
+        # Compile the grid into CSR form once; every later neighbors() call is a slice read
+        if self._adjacency is None:
+            self._adjacency = Adjacency.compile(self)
+        return self._adjacency
+
+    def neighbors(self, cell):
+        # Free 4-neighbours of a cell id, in the same up, down, left, right order as constants.moves
+        adjacency = self._adjacency
+        if adjacency is not None:
+            offsets = adjacency.offsets
+            return adjacency.targets[offsets[cell]:offsets[cell + 1]]
+        cols = self.cols
+        cells = self.cells
+        r, c = divmod(cell, cols)
+        result = []
+        if r > 0 and not cells[cell - cols]:
+            result.append(cell - cols)
+        if r < self.rows - 1 and not cells[cell + cols]:
+            result.append(cell + cols)
+        if c > 0 and not cells[cell - 1]:
+            result.append(cell - 1)
+        if c < cols - 1 and not cells[cell + 1]:
+            result.append(cell + 1)
+        return result
+
+    def obstacles(self):
+        cols = self.cols
+        return {divmod(i, cols) for i, blocked in enumerate(self.cells) if blocked}
+
+    def copy(self):
+        grid = Grid(self.rows, self.cols)
+        grid.cells[:] = self.cells
+        if self.weights is not None:
+            grid.weights = bytearray(self.weights)
+        grid._zobrist = self._zobrist
+        grid._adjacency = self._adjacency  # never mutated in place, so safe to share
+        return grid
+
+
+def is_valid(pos, grid):
     r, c = pos
-    return 0 <= r < rows and 0 <= c < cols and pos not in obstacles
-
-def generate_random_obstacles(start, goal, rows, cols, num_obstacles):
-    all_cells = [(r, c) for r in range(rows) for c in range(cols)]
-    all_cells.remove(start)
-    all_cells.remove(goal)
-    while True:
-        obstacles = set(random.sample(all_cells, num_obstacles))
-        if is_solvable(start, goal, obstacles, rows, cols):
-            return obstacles
-
-def is_solvable(start, goal, obstacles, rows, cols):
-    queue = deque([start])
-    visited = {start}
+    return 0 <= r < grid.rows and 0 <= c < grid.cols and not grid.cells[r * grid.cols + c]
+
+def generate_random_grid(start, goal, rows, cols, num_obstacles=None, density=None, seed=None):
+    # Solvable by construction, in one linear pass with no retry loop: start fully blocked,
+    # open cells in random order while a union-find tracks when start and goal become connected,
+    # then open more cells (or re-block cells off a start-goal path) to hit the obstacle count
+    rng = random.Random(seed)
+    size = rows * cols
+    if num_obstacles is None:
+        num_obstacles = int(round((density or 0.0) * size))
+    grid = Grid(rows, cols)
+    cells = grid.cells
+    cells[:] = b"\x01" * size
+    start_cell, goal_cell = grid.index(start), grid.index(goal)
+    order = [cell for cell in range(size) if cell != start_cell and cell != goal_cell]
+    rng.shuffle(order)
+
+    parent = list(range(size))
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    def open_cell(cell):
+        cells[cell] = 0
+        for neighbor in grid.neighbors(cell):
+            parent[find(neighbor)] = find(cell)
+
+    open_cell(start_cell)
+    open_cell(goal_cell)
+    endpoints = len({start_cell, goal_cell})
+    opened = 0
+    while find(start_cell) != find(goal_cell):
+        open_cell(order[opened])
+        opened += 1
+
+    num_free = max(size - num_obstacles, endpoints)
+    while opened + endpoints < num_free:
+        open_cell(order[opened])
+        opened += 1
+
+    if opened + endpoints > num_free:
+        # Too many cells were needed to connect start and goal: keep a random shortest path of the
+        # empty grid and spend what is left of the free-cell budget on the cells opened first.
+        # Fewer obstacles than requested are left only when even that path does not fit.
+        on_path = set(_staircase(grid, start, goal, rng))
+        cells[:] = b"\x01" * size
+        spare = num_free - len(on_path)
+        for cell in on_path:
+            cells[cell] = 0
+        for cell in order[:opened]:
+            if spare <= 0:
+                break
+            if cell not in on_path:
+                cells[cell] = 0
+                spare -= 1
+    return grid
+
+def _staircase(grid, start, goal, rng):
+    # Cell ids of a Manhattan-shortest path from start to goal, its row and column steps shuffled
+    (r, c), (gr, gc) = start, goal
+    dr = 1 if gr > r else -1
+    dc = 1 if gc > c else -1
+    steps = [(dr, 0)] * abs(gr - r) + [(0, dc)] * abs(gc - c)
+    rng.shuffle(steps)
+    path = [grid.index(start)]
+    for step_r, step_c in steps:
+        r += step_r
+        c += step_c
+        path.append(grid.index((r, c)))
+    return path
+
+def is_solvable(start, goal, grid, bulk=False):
+    # bulk: whole-layer bitset BFS, faster on open maps with few, wide layers
+    start_cell = grid.index(start)
+    goal_cell = grid.index(goal)
+    if bulk:
+        return reachable(grid, start_cell, goal_cell)
+    queue = deque([start_cell])
+    visited = bytearray(grid.size)
+    visited[start_cell] = 1
     while queue:
         current = queue.popleft()
-        if current == goal:
+        if current == goal_cell:
             return True
-        for move in moves:
-            neighbor = (current[0] + move[0], current[1] + move[1])
-            if (
-                0 <= neighbor[0] < rows and
-                0 <= neighbor[1] < cols and
-                neighbor not in obstacles and
-                neighbor not in visited
-            ):
-                visited.add(neighbor)
+        for neighbor in grid.neighbors(current):
+            if not visited[neighbor]:
+                visited[neighbor] = 1
                 queue.append(neighbor)
     return False
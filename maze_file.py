@@ -0,0 +1,174 @@
+# On-disk maze format and importers for ASCII maps and images
+#
+# A .maze file is a 64-byte header followed by the cells and optional terrain weights:
+#   header   magic MAZ1, flags, rows, cols, start cell, goal cell, seed (-1 where not set)
+#   cells    one byte per cell (1 = obstacle), the same layout as Grid.cells,
+#            or one bit per cell (little-endian within each byte) when FLAG_PACKED is set
+#   weights  one byte per cell (1-255) when FLAG_WEIGHTS is set
+# Unpacked files are memory-mapped copy-on-write and the grid's cells and weights are views into
+# the mapping, so opening even a multi-gigabyte maze reads nothing up front: pages fault in as a
+# search touches them, and set_blocked / set_weight stay private to the process. Packed files
+# are 8x smaller but are expanded into memory when loaded.
+
+import argparse
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from maze import BLOCKED_DIGITS, Grid, generate_random_grid, is_solvable
+
+_MAGIC = b"MAZ1"
+_HEADER = struct.Struct("<4sI5q")  # magic, flags, rows, cols, start cell, goal cell, seed
+HEADER_SIZE = 64
+FLAG_PACKED = 1
+FLAG_WEIGHTS = 2
+
+MazeFile = namedtuple("MazeFile", ["grid", "start", "goal", "seed"])  # start / goal / seed may be None
+
+_UNPACK = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+_ASCII_BLOCKED = b"@OTW#X"  # Moving AI obstacles (out of bounds, trees, water) plus '#' and 'X'
+
+
+def save_maze(path, grid, start=None, goal=None, seed=None, packed=False):
+    size = grid.size
+    flags = (FLAG_PACKED if packed else 0) | (FLAG_WEIGHTS if grid.weights is not None else 0)
+    header = _HEADER.pack(_MAGIC, flags, grid.rows, grid.cols,
+                          grid.index(start) if start is not None else -1,
+                          grid.index(goal) if goal is not None else -1,
+                          seed if seed is not None else -1)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        if packed:
+            # Digits run from the last cell down to cell 0, so bit i of the int is cell i
+            bits = int(bytes(grid.cells).translate(BLOCKED_DIGITS)[::-1], 2) if size else 0
+            f.write(bits.to_bytes((size + 7) // 8, "little"))
+        else:
+            f.write(grid.cells)
+        if grid.weights is not None:
+            f.write(grid.weights)
+    os.replace(tmp, path)
+
+def load_maze(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:4] != _MAGIC:
+            raise ValueError(f"{path} is not a maze file")
+        _, flags, rows, cols, start, goal, seed = _HEADER.unpack_from(header)
+        size = rows * cols
+        cells_size = (size + 7) // 8 if flags & FLAG_PACKED else size
+        expected = HEADER_SIZE + cells_size + (size if flags & FLAG_WEIGHTS else 0)
+        if os.fstat(f.fileno()).st_size < expected:
+            raise ValueError(f"{path} is truncated: expected {expected} bytes")
+        data = memoryview(mmap.mmap(f.fileno(), expected, access=mmap.ACCESS_COPY)) if size else memoryview(bytearray(expected))
+    offset = HEADER_SIZE
+    if flags & FLAG_PACKED:
+        cells = bytearray(b"".join(map(_UNPACK.__getitem__, data[offset:offset + cells_size])))
+        del cells[size:]
+    else:
+        cells = data[offset:offset + size]
+    offset += cells_size
+    weights = data[offset:offset + size] if flags & FLAG_WEIGHTS else None
+    grid = Grid.from_buffer(rows, cols, cells, weights)
+    return MazeFile(grid,
+                    divmod(start, cols) if start >= 0 else None,
+                    divmod(goal, cols) if goal >= 0 else None,
+                    seed if seed >= 0 else None)
+
+def read_ascii_map(path):
+    # Moving AI .map files ("type"/"height"/"width"/"map" header, then one line per row), or bare
+    # rows of characters. '@', 'O', 'T', 'W', '#' and 'X' are obstacles and everything else is
+    # free; in bare files 'S' and 'G' also mark the start and goal.
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    header = {}
+    if lines and lines[0].startswith(b"type"):
+        while lines and lines[0].strip() != b"map":
+            key, _, value = lines.pop(0).partition(b" ")
+            header[key.decode()] = value.strip().decode()
+        if not lines:
+            raise ValueError(f"{path} has no 'map' section")
+        lines.pop(0)
+    rows = [line.rstrip(b"\r") for line in lines if line.strip()]
+    height = int(header.get("height", len(rows)))
+    width = int(header.get("width", max(map(len, rows), default=0)))
+    if len(rows) != height or any(len(row) != width for row in rows):
+        raise ValueError(f"{path}: expected {height} rows of {width} cells")
+    table = bytes(1 if byte in _ASCII_BLOCKED else 0 for byte in range(256))
+    data = b"".join(rows)
+    grid = Grid.from_bytes(height, width, data.translate(table))
+    start = goal = None
+    if not header:
+        if b"S" in data:
+            start = divmod(data.index(b"S"), width)
+        if b"G" in data:
+            goal = divmod(data.index(b"G"), width)
+    return MazeFile(grid, start, goal, None)
+
+def _find_pixel(rgb, color):
+    # Index of the first pixel with exactly this colour in packed RGB bytes, or None
+    i = rgb.find(color)
+    while i != -1 and i % 3:
+        i = rgb.find(color, i + 1)
+    return i // 3 if i != -1 else None
+
+def read_image(path, threshold=128):
+    # PNG, BMP, ... via pygame: dark pixels (every channel below threshold) are obstacles, and the
+    # first pure green and pure red pixels, the GUIs' start and goal colours, become start and goal
+    import pygame
+    surface = pygame.image.load(path)
+    cols, rows = surface.get_size()
+    rgb = pygame.image.tobytes(surface, "RGB")
+    dark = bytes(1 if value < threshold else 0 for value in range(256))
+    blocked = -1
+    for channel in range(3):
+        blocked &= int.from_bytes(rgb[channel::3].translate(dark), "little")
+    grid = Grid.from_bytes(rows, cols, blocked.to_bytes(rows * cols, "little"))
+    start, goal = _find_pixel(rgb, b"\x00\xff\x00"), _find_pixel(rgb, b"\xff\x00\x00")
+    return MazeFile(grid,
+                    divmod(start, cols) if start is not None else None,
+                    divmod(goal, cols) if goal is not None else None,
+                    None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create, import and inspect .maze files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write a random solvable maze")
+    generate.add_argument("output")
+    generate.add_argument("--size", type=int, default=1000, help="square maze side length")
+    generate.add_argument("--density", type=float, default=0.3)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--packed", action="store_true", help="store one bit per cell")
+    convert = commands.add_parser("import", help="convert an ASCII .map or an image")
+    convert.add_argument("source")
+    convert.add_argument("output")
+    convert.add_argument("--packed", action="store_true", help="store one bit per cell")
+    info = commands.add_parser("info", help="print a maze file's header")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        start, goal = (0, 0), (args.size - 1, args.size - 1)
+        grid = generate_random_grid(start, goal, args.size, args.size, density=args.density, seed=args.seed)
+        save_maze(args.output, grid, start, goal, args.seed, args.packed)
+    elif args.command == "import":
+        reader = read_ascii_map if os.path.splitext(args.source)[1].lower() in (".map", ".txt") else read_image
+        maze = reader(args.source)
+        save_maze(args.output, maze.grid, maze.start, maze.goal, packed=args.packed)
+    else:
+        maze = load_maze(args.path)
+        grid = maze.grid
+        chunk = 1 << 24
+        obstacles = sum(bytes(grid.cells[i:i + chunk]).count(1) for i in range(0, grid.size, chunk))
+        print(f"{grid.rows}x{grid.cols}, {obstacles} obstacles, "
+              f"start {maze.start}, goal {maze.goal}, seed {maze.seed}, "
+              f"{'weighted' if grid.weights is not None else 'unit cost'}")
+        if maze.start is not None and maze.goal is not None:
+            solvable = is_solvable(maze.start, maze.goal, grid, bulk=True)
+            print(f"goal {'reachable' if solvable else 'unreachable'} from start")
+
+
+if __name__ == "__main__":
+    main()
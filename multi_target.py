@@ -0,0 +1,99 @@
+# One-to-many and many-to-many shortest paths from shared Dijkstra sweeps
+#
+# one_to_many runs a single Dijkstra from the source and stops as soon as every requested target
+# is settled, then reads each target's cost and path off the same g / parent arrays. many_to_many
+# runs one sweep per source or, when there are fewer targets, one backward sweep per target that
+# serves every source at once. As in bidirectional_search, stepping backward out of a cell costs
+# that cell's own weight. Each result's expanded / pushed are the sweep's counts at the moment its
+# target was settled, i.e. the work a dedicated search would have needed.
+
+from array import array
+
+from a_star import UNSEEN, SearchResult, reconstruct_path
+from bucket_queue import BucketQueue, queue_ops
+from instrumentation import phase
+
+
+def sweep(grid, source, targets, backward=False, buckets=False, stats=None):
+    # Dijkstra from the source cell until every target cell is settled (or the component runs out).
+    # Returns g and parent arrays and, per settled target, the (expanded, pushed) counts so far.
+    g = array("i", [UNSEEN]) * grid.size
+    parent = array("i", [UNSEEN]) * grid.size
+    g[source] = 0
+    open_set = [(0, source)]
+    if buckets:
+        open_set = BucketQueue(grid.max_weight() + 1, open_set)
+    push, pop = queue_ops(open_set)
+    weights = grid.weights
+    remaining = set(targets)
+    settled = {}
+    expanded = 0
+    pushed = 1
+    while open_set and remaining:
+        d, cell = pop(open_set)
+        if d != g[cell]:
+            continue
+        expanded += 1
+        if cell in remaining:
+            remaining.discard(cell)
+            settled[cell] = (expanded, pushed)
+        step = 1 if weights is None else weights[cell]
+        for neighbor in grid.neighbors(cell):
+            if weights is not None and not backward:
+                step = weights[neighbor]
+            new_g = d + step
+            if g[neighbor] == UNSEEN or new_g < g[neighbor]:
+                g[neighbor] = new_g
+                parent[neighbor] = cell
+                push(open_set, (new_g, neighbor))
+                pushed += 1
+        if stats is not None:
+            stats.sample_frontier(len(open_set))
+    if stats is not None:
+        stats.tally(expanded, pushed, len(open_set), grid.size - g.count(UNSEEN))
+    return g, parent, settled, (expanded, pushed)
+
+def _result(g, parent, cell, settled, totals, grid, backward):
+    expanded, pushed = settled.get(cell, totals)
+    if g[cell] == UNSEEN:
+        return SearchResult([], None, expanded, pushed)
+    path = reconstruct_path(parent, cell, grid)
+    if backward:
+        path.reverse()  # parents of a backward sweep lead from the cell towards its source
+    return SearchResult(path, g[cell], expanded, pushed)
+
+def one_to_many(grid, source, targets, buckets=False, stats=None):
+    # One SearchResult per target, in the order given, from a single sweep out of source
+    cells = [grid.index(target) for target in targets]
+    with phase(stats, "search"):
+        g, parent, settled, totals = sweep(grid, grid.index(source), cells, buckets=buckets, stats=stats)
+    with phase(stats, "path"):
+        results = [_result(g, parent, cell, settled, totals, grid, False) for cell in cells]
+    if stats is not None:
+        stats.finish()
+    return results
+
+def many_to_many(grid, sources, targets, buckets=False, stats=None):
+    # results[i][j] is the SearchResult from sources[i] to targets[j]. Sweeps run from whichever
+    # side has fewer distinct cells, so each backward search is shared by all the sources.
+    # Sources and targets are expected to be free cells: a backward sweep never enters a blocked one.
+    source_cells = [grid.index(source) for source in sources]
+    target_cells = [grid.index(target) for target in targets]
+    backward = len(set(target_cells)) < len(set(source_cells))
+    results = [[None] * len(target_cells) for _ in source_cells]
+    roots, leaves = (target_cells, source_cells) if backward else (source_cells, target_cells)
+    done = {}
+    for i, root in enumerate(roots):
+        if root not in done:
+            with phase(stats, "search"):
+                g, parent, settled, totals = sweep(grid, root, leaves, backward, buckets, stats)
+            with phase(stats, "path"):
+                done[root] = [_result(g, parent, leaf, settled, totals, grid, backward) for leaf in leaves]
+        for j, result in enumerate(done[root]):
+            if backward:
+                results[j][i] = result
+            else:
+                results[i][j] = result
+    if stats is not None:
+        stats.finish()
+    return results
@@ -0,0 +1,172 @@
+# Parallel bidirectional Dijkstra: the forward and backward searches run in two processes
+#
+# The occupancy grid, optional terrain weights and each direction's distance and parent arrays
+# live in multiprocessing.shared_memory, so every worker sees the other's labels as they are
+# written. A small shared control block holds the best meeting cost mu and node (updated under a
+# lock) and each worker's current heap-top key. A worker stops once its top key plus the other's
+# reaches mu: stale reads of either value only make that test later, never earlier. After both
+# exit, a scan for the cheapest node labelled by both searches settles any meeting the two
+# processes raced past, so the result is exact.
+
+import heapq
+import multiprocessing as mp
+from array import array
+from multiprocessing import shared_memory
+
+from a_star import SearchResult
+
+_INF = 2 ** 62  # mu / heap-top value meaning "none yet" or "frontier exhausted"
+_MU, _MEET, _TOP, _EXPANDED, _PUSHED = 0, 1, 2, 4, 6  # control slots; per-direction ones take 2
+
+
+def _worker(direction, source, rows, cols, names, lock):
+    # direction 0 searches forward from the start, 1 backward from the goal
+    blocks, views = [], []
+
+    def attach(name, fmt):
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        views.append(block.buf.cast(fmt))
+        return views[-1]
+    try:
+        cells = attach(names["cells"], "B")
+        weights = attach(names["weights"], "B") if names["weights"] else None
+        dist = attach(names["dist"][direction], "i")
+        other_dist = attach(names["dist"][1 - direction], "i")
+        parent = attach(names["parent"][direction], "i")
+        control = attach(names["control"], "q")
+        _search(direction, source, rows, cols, cells, weights, dist, other_dist, parent, control, lock)
+    finally:
+        # Views must be released before their blocks can close
+        for view in views:
+            view.release()
+        for block in blocks:
+            block.close()
+
+def _search(direction, source, rows, cols, cells, weights, dist, other_dist, parent, control, lock):
+    top_slot, other_top_slot = _TOP + direction, _TOP + 1 - direction
+    backward = direction == 1
+    heap = [(0, source)]
+    expanded = 0
+    pushed = 1
+    last = rows * cols - cols
+    while heap:
+        g, cell = heap[0]
+        control[top_slot] = g
+        if g + control[other_top_slot] >= control[_MU]:
+            break
+        heapq.heappop(heap)
+        if g != dist[cell]:
+            continue
+        expanded += 1
+        c = cell % cols
+        neighbors = []
+        if cell >= cols:
+            neighbors.append(cell - cols)
+        if cell < last:
+            neighbors.append(cell + cols)
+        if c > 0:
+            neighbors.append(cell - 1)
+        if c < cols - 1:
+            neighbors.append(cell + 1)
+        step = 1 if weights is None or not backward else weights[cell]
+        for neighbor in neighbors:
+            if cells[neighbor]:
+                continue
+            if weights is not None and not backward:
+                step = weights[neighbor]
+            new_g = g + step
+            old = dist[neighbor]
+            if old != -1 and old <= new_g:
+                continue
+            dist[neighbor] = new_g
+            parent[neighbor] = cell
+            heapq.heappush(heap, (new_g, neighbor))
+            pushed += 1
+            other = other_dist[neighbor]
+            if other != -1 and new_g + other < control[_MU]:
+                with lock:
+                    if new_g + other < control[_MU]:
+                        control[_MU] = new_g + other
+                        control[_MEET] = neighbor
+    else:
+        control[top_slot] = _INF
+    control[_EXPANDED + direction] = expanded
+    control[_PUSHED + direction] = pushed
+
+
+def _labelled(labels, cell):
+    labels = array("i", labels)
+    labels[cell] = 0
+    return labels.tobytes()
+
+def _path(meet, parent_fwd, parent_bwd, cols):
+    path = []
+    cell = meet
+    while cell != -1:
+        path.append(divmod(cell, cols))
+        cell = parent_fwd[cell]
+    path.reverse()
+    cell = parent_bwd[meet]
+    while cell != -1:
+        path.append(divmod(cell, cols))
+        cell = parent_bwd[cell]
+    return path
+
+def parallel_bidirectional_dijkstra(grid, start, goal):
+    size = grid.size
+    start_cell, goal_cell = grid.index(start), grid.index(goal)
+    if start_cell == goal_cell:
+        return SearchResult([start], 0, 0, 2)
+    labels = array("i", [-1]) * size
+    blocks = {}
+    try:
+        def create(key, data):
+            block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            block.buf[:len(data)] = data
+            blocks[key] = block
+            return block.name
+
+        names = {
+            "cells": create("cells", grid.cells),
+            "weights": create("weights", grid.weights) if grid.weights is not None else None,
+            # Both sources are labelled before either worker starts, so a search that exhausts its
+            # side early still sees the other's source and records the meeting
+            "dist": (create("dist_fwd", _labelled(labels, start_cell)), create("dist_bwd", _labelled(labels, goal_cell))),
+            "parent": (create("parent_fwd", labels.tobytes()), create("parent_bwd", labels.tobytes())),
+            "control": create("control", array("q", [_INF, -1, 0, 0, 0, 0, 0, 0]).tobytes()),
+        }
+        ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+        lock = ctx.Lock()
+        workers = [ctx.Process(target=_worker, args=(direction, source, grid.rows, grid.cols, names, lock))
+                   for direction, source in ((0, start_cell), (1, goal_cell))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if any(worker.exitcode for worker in workers):
+            raise RuntimeError("bidirectional search worker failed")
+
+        control = array("q", bytes(blocks["control"].buf[:8 * 8]))
+        dist_fwd = array("i")
+        dist_fwd.frombytes(bytes(blocks["dist_fwd"].buf[:4 * size]))
+        dist_bwd = array("i")
+        dist_bwd.frombytes(bytes(blocks["dist_bwd"].buf[:4 * size]))
+        mu, meet = control[_MU], control[_MEET]
+        # Settle any meeting node the workers raced past (each wrote its label just as the other read it)
+        for cell, (f, b) in enumerate(zip(dist_fwd, dist_bwd)):
+            if f != -1 and b != -1 and f + b < mu:
+                mu, meet = f + b, cell
+        expanded = control[_EXPANDED] + control[_EXPANDED + 1]
+        pushed = control[_PUSHED] + control[_PUSHED + 1]
+        if meet == -1:
+            return SearchResult([], None, expanded, pushed)
+        parent_fwd = array("i")
+        parent_fwd.frombytes(bytes(blocks["parent_fwd"].buf[:4 * size]))
+        parent_bwd = array("i")
+        parent_bwd.frombytes(bytes(blocks["parent_bwd"].buf[:4 * size]))
+        return SearchResult(_path(meet, parent_fwd, parent_bwd, grid.cols), mu, expanded, pushed)
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
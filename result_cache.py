@@ -0,0 +1,80 @@
+# Solve-result cache keyed by the maze's Zobrist hash, start, goal and solver name
+#
+# A bounded in-memory LRU sits in front of the solvers, with an optional directory of JSON files
+# behind it so repeat queries survive across processes and runs. Grid.zobrist is maintained
+# incrementally, so keying a query costs O(1) once the hash of a maze has been computed; callers
+# that rebuild a grid from raw cells can pass the hash they already have instead.
+
+import json
+import os
+from collections import OrderedDict
+
+from a_star import SearchResult
+from ida_star import BoundedResult
+
+_RESULT_TYPES = {cls.__name__: cls for cls in (SearchResult, BoundedResult)}  # restored by name from disk
+
+
+class ResultCache:
+    def __init__(self, capacity=1024, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, grid, start, goal, solver, zobrist=None):
+        if zobrist is None:
+            zobrist = grid.zobrist
+        return zobrist, grid.rows, grid.cols, tuple(start), tuple(goal), solver
+
+    def _file(self, key):
+        zobrist, rows, cols, (sr, sc), (gr, gc), solver = key
+        return os.path.join(self.directory, f"{zobrist:016x}-{rows}x{cols}-{sr}_{sc}-{gr}_{gc}-{solver}.json")
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+        if self.directory:
+            try:
+                with open(self._file(key)) as f:
+                    data = json.load(f)
+                cls = _RESULT_TYPES[data.pop("type", "SearchResult")]
+                data["path"] = [tuple(p) for p in data["path"]]
+                result = cls(**data)
+            except (OSError, ValueError, KeyError, TypeError):
+                pass  # missing, unreadable or from another version: solve again
+            else:
+                self._remember(key, result)
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.directory:
+            path = self._file(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(dict(result._asdict(), type=type(result).__name__), f)
+            os.replace(tmp, path)  # concurrent writers of the same key just overwrite each other
+
+    def solve(self, solver, name, grid, start, goal, zobrist=None):
+        key = self.key(grid, start, goal, name, zobrist)
+        result = self.get(key)
+        if result is None:
+            result = solver(grid, start, goal)
+            self.put(key, result)
+        return result
@@ -1,37 +1,110 @@
 # History management (for step/back functionality)
+# Each step records only the changes it makes, so Back reverts in O(changes)
+# instead of restoring a deepcopy of every structure.
 
-import copy
-
-def save_state(open_set, visited, current_node, parents, open_dict, found, final_path, history):
-    history.append((
-        copy.deepcopy(open_set),
-        copy.deepcopy(visited),
-        copy.deepcopy(current_node),
-        copy.deepcopy(parents),
-        copy.deepcopy(open_dict),
-        found,
-        copy.deepcopy(final_path),
-    ))
-
-def load_previous_state(history):
-    if len(history) > 1:
-        history.pop()
-    return copy.deepcopy(history[-1])
-
-def save_state_bidirectional(queue_start, queue_goal, visited_start, visited_goal, expanded_node, parents_start, parents_goal, found, final_path, history):
-    history.append((
-        copy.deepcopy(queue_start),
-        copy.deepcopy(queue_goal),
-        copy.deepcopy(visited_start),
-        copy.deepcopy(visited_goal),
-        copy.deepcopy(expanded_node),
-        copy.deepcopy(parents_start),
-        copy.deepcopy(parents_goal),
-        found,
-        copy.deepcopy(final_path)
-    ))
-
-def load_previous_state_bidirectional(history):
-    if len(history) > 1:
-        history.pop()
-    return copy.deepcopy(history[-1])
+_SET, _ADD, _APPEND, _POP, _WRITE, _POPLEFT = range(6)
+_MISSING = object()
+
+
+class Journal:
+    def __init__(self):
+        self.steps = []  # one (saved_values, changes) pair per step
+
+    def __len__(self):
+        return len(self.steps)
+
+    def begin_step(self, *values):
+        # Start recording a step; values (current node, found flag, ...) are handed back by undo_step
+        self.steps.append((values, []))
+
+    def undo_step(self):
+        values, changes = self.steps.pop()
+        for op, container, key, old in reversed(changes):
+            if op == _SET:
+                if old is _MISSING:
+                    del container[key]
+                else:
+                    container[key] = old
+            elif op == _ADD:
+                container.discard(key)
+            elif op == _APPEND:
+                container.pop()
+            elif op == _POP:
+                container.append(old)
+            elif op == _WRITE:
+                container[key] = old
+            elif op == _POPLEFT:
+                container.appendleft(old)
+        return values
+
+    def last_keys(self, *containers):
+        # Keys (cells) the most recent step wrote in the given containers, e.g. for dirty-cell redraws
+        ids = {id(container) for container in containers}
+        return {key for _, container, key, _ in self.steps[-1][1] if id(container) in ids}
+
+    # Dict updates (parents, distances, wanted cells)
+    def set(self, mapping, key, value):
+        self.steps[-1][1].append((_SET, mapping, key, mapping.get(key, _MISSING)))
+        mapping[key] = value
+
+    # Set, list and deque updates (visited, facts, inference chain, agenda)
+    def add(self, items, item):
+        if item not in items:
+            self.steps[-1][1].append((_ADD, items, item, None))
+            items.add(item)
+
+    def append(self, items, item):
+        self.steps[-1][1].append((_APPEND, items, None, None))
+        items.append(item)
+
+    def popleft(self, queue):
+        item = queue.popleft()
+        self.steps[-1][1].append((_POPLEFT, queue, None, item))
+        return item
+
+    # In-place slot writes (g / parent arrays, closed bitmap, heap slots)
+    def write(self, seq, pos, item):
+        self.steps[-1][1].append((_WRITE, seq, pos, seq[pos]))
+        seq[pos] = item
+
+    # Heap operations; same sift order as heapq, but every slot write is logged
+    def _sift_down(self, heap, startpos, pos):
+        newitem = heap[pos]
+        while pos > startpos:
+            parentpos = (pos - 1) >> 1
+            parent = heap[parentpos]
+            if newitem < parent:
+                self.write(heap, pos, parent)
+                pos = parentpos
+                continue
+            break
+        self.write(heap, pos, newitem)
+
+    def _sift_up(self, heap, pos):
+        endpos = len(heap)
+        startpos = pos
+        newitem = heap[pos]
+        childpos = 2 * pos + 1
+        while childpos < endpos:
+            rightpos = childpos + 1
+            if rightpos < endpos and not heap[childpos] < heap[rightpos]:
+                childpos = rightpos
+            self.write(heap, pos, heap[childpos])
+            pos = childpos
+            childpos = 2 * pos + 1
+        self.write(heap, pos, newitem)
+        self._sift_down(heap, startpos, pos)
+
+    def heappush(self, heap, item):
+        self.append(heap, item)
+        self._sift_down(heap, 0, len(heap) - 1)
+
+    def heappop(self, heap):
+        lastelt = heap.pop()
+        self.steps[-1][1].append((_POP, heap, None, lastelt))
+        if heap:
+            returnitem = heap[0]
+            self.write(heap, 0, lastelt)
+            self._sift_up(heap, 0)
+            return returnitem
+        return lastelt
@@ -0,0 +1,301 @@
+# Binary step traces: fixed-width event records, a step index and periodic keyframes
+#
+# A trace is three append-only files sharing a base path:
+#   base.events  header (rows, cols, start, goal, sides, interval), the occupancy bitmap, then
+#                16-byte records (kind, side, node, parent, cost)
+#   base.steps   one int64 per step: the index of the step's first record
+#   base.keys    one keyframe every `interval` steps: the full playback state before that step
+# Every entry is fixed width, so a step is located in O(1). Seeking memory-maps the files, loads
+# the nearest keyframe at or before the step and replays at most `interval` steps of records.
+
+import argparse
+import mmap
+import os
+import struct
+from array import array
+
+from maze import Grid, generate_random_grid
+from maze_file import load_maze
+from events import Expand, Push, Relax, Meet, Goal
+import a_star
+import bidirectional_search
+import forward_chaining
+
+_MAGIC = b"TRC1"
+_HEADER = struct.Struct("<4s6I")  # magic, rows, cols, start cell, goal cell, sides, interval
+_RECORD = struct.Struct("<BBxxiii")  # kind, side, node, parent, cost
+_STEP = struct.Struct("<q")
+_SCALARS = struct.Struct("<5i")  # current, meet, mu, goal, found
+_KINDS = {Expand: 1, Push: 2, Relax: 3, Meet: 4, Goal: 5}
+_EXPAND, _PUSH, _RELAX, _MEET, _GOAL = 1, 2, 3, 4, 5
+NONE = -1  # empty node / parent / cost field
+
+
+class TraceState:
+    # Playback state rebuilt from records: per side cost, parent, reached and expanded per cell
+    def __init__(self, size, sides):
+        self.size = size
+        self.sides = sides
+        self.cost = [array("i", [NONE]) * size for _ in range(sides)]
+        self.parent = [array("i", [NONE]) * size for _ in range(sides)]
+        self.reached = [bytearray(size) for _ in range(sides)]
+        self.expanded = [bytearray(size) for _ in range(sides)]
+        self.current = self.meet = self.mu = self.goal = NONE
+        self.found = 0
+
+    def apply(self, kind, side, node, parent, cost):
+        if kind == _EXPAND:
+            self.expanded[side][node] = 1
+            self.current = node
+        elif kind == _PUSH or kind == _RELAX:
+            self.reached[side][node] = 1
+            self.cost[side][node] = cost
+            self.parent[side][node] = parent
+        elif kind == _MEET:
+            self.meet, self.mu = node, cost
+        elif kind == _GOAL:
+            self.goal, self.found = node, 1
+
+    def keyframe_size(self):
+        return _SCALARS.size + self.sides * self.size * 10
+
+    def to_bytes(self):
+        # Keyframe layout: the scalars, then per side cost, parent, reached and expanded
+        parts = [_SCALARS.pack(self.current, self.meet, self.mu, self.goal, self.found)]
+        for side in range(self.sides):
+            parts += [self.cost[side].tobytes(), self.parent[side].tobytes(), self.reached[side], self.expanded[side]]
+        return b"".join(parts)
+
+    def load(self, data, offset):
+        self.current, self.meet, self.mu, self.goal, self.found = _SCALARS.unpack_from(data, offset)
+        offset += _SCALARS.size
+        size = self.size
+        for side in range(self.sides):
+            self.cost[side] = array("i")
+            self.cost[side].frombytes(data[offset:offset + 4 * size])
+            offset += 4 * size
+            self.parent[side] = array("i")
+            self.parent[side].frombytes(data[offset:offset + 4 * size])
+            offset += 4 * size
+            self.reached[side][:] = data[offset:offset + size]
+            offset += size
+            self.expanded[side][:] = data[offset:offset + size]
+            offset += size
+
+    def path(self):
+        # Cell ids of the solution: forward parents back from the goal (the meeting node for
+        # bidirectional traces), then the backward parents on to the goal
+        if self.goal == NONE:
+            return []
+        joint = self.meet if self.sides == 2 else self.goal
+        path = []
+        cell = joint
+        while cell != NONE:
+            path.append(cell)
+            cell = self.parent[0][cell]
+        path.reverse()
+        if self.sides == 2:
+            cell = self.parent[1][joint]
+            while cell != NONE:
+                path.append(cell)
+                cell = self.parent[1][cell]
+        return path
+
+
+class SideView:
+    # Position-keyed, dict-like view of one side of a TraceState, so the GUIs' cell looks can read
+    # a trace the way they read their visited / parents dicts: pos in view, view.get(pos) -> parent
+    def __init__(self, state, side, cols):
+        self.state = state
+        self.side = side
+        self.cols = cols
+
+    def __contains__(self, pos):
+        return bool(self.state.reached[self.side][pos[0] * self.cols + pos[1]])
+
+    def __getitem__(self, pos):
+        return self.state.cost[self.side][pos[0] * self.cols + pos[1]]
+
+    def get(self, pos, default=None):
+        parent = self.state.parent[self.side][pos[0] * self.cols + pos[1]]
+        return default if parent == NONE else divmod(parent, self.cols)
+
+
+def _encode(event, grid):
+    kind = type(event)
+    node = getattr(event, "node", None)
+    side = 1 if getattr(event, "side", None) == "backward" else 0
+    if kind is Goal:
+        # Goal records carry the node the path is rebuilt from: the goal, or the meeting node
+        node = event.path[-1] if event.path else None
+        parent = None
+    else:
+        parent = getattr(event, "parent", None)
+    return (_KINDS[kind], side,
+            NONE if node is None else grid.index(node),
+            NONE if parent is None else grid.index(parent),
+            NONE if event.cost is None else event.cost)
+
+
+class TraceWriter:
+    def __init__(self, base, grid, start, goal, sides=1, interval=None, seed=()):
+        # seed: events describing the state before the first step (e.g. the start pushed at cost 0)
+        self.grid = grid
+        self.interval = interval or max(256, grid.size // 16)
+        self.events = open(base + ".events", "wb")
+        self.steps = open(base + ".steps", "wb")
+        self.keys = open(base + ".keys", "wb")
+        self.events.write(_HEADER.pack(_MAGIC, grid.rows, grid.cols, grid.index(start), grid.index(goal),
+                                       sides, self.interval))
+        self.events.write(grid.cells)
+        self.state = TraceState(grid.size, sides)
+        for event in seed:
+            self.state.apply(*_encode(event, grid))
+        self.step_count = 0
+        self.record_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def begin_step(self):
+        if self.step_count % self.interval == 0:
+            self.keys.write(self.state.to_bytes())
+        self.steps.write(_STEP.pack(self.record_count))
+        self.step_count += 1
+
+    def write(self, event):
+        record = _encode(event, self.grid)
+        self.state.apply(*record)
+        self.events.write(_RECORD.pack(*record))
+        self.record_count += 1
+
+    def record(self, events):
+        # Append a whole event stream; every Expand starts a new step
+        for event in events:
+            if type(event) is Expand or self.step_count == 0:
+                self.begin_step()
+            self.write(event)
+
+    def close(self):
+        for f in (self.events, self.steps, self.keys):
+            f.close()
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class TraceReader:
+    def __init__(self, base):
+        self.events = _map(base + ".events")
+        self.steps = _map(base + ".steps")
+        self.keys = _map(base + ".keys")
+        magic, rows, cols, start, goal, sides, interval = _HEADER.unpack_from(self.events, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{base}.events is not a step trace")
+        size = rows * cols
+        self.grid = Grid.from_bytes(rows, cols, self.events[_HEADER.size:_HEADER.size + size])
+        self.start = divmod(start, cols)
+        self.goal = divmod(goal, cols)
+        self.sides = sides
+        self.interval = interval
+        self.first_record = _HEADER.size + size
+        self.record_count = (len(self.events) - self.first_record) // _RECORD.size
+        self.state = TraceState(size, sides)
+        self.keyframe_size = self.state.keyframe_size()
+        self.position = None  # number of steps applied to self.state
+
+    def __len__(self):
+        return len(self.steps) // _STEP.size
+
+    def step_records(self, step):
+        # Index range of the records written during step (0-based)
+        first = _STEP.unpack_from(self.steps, step * _STEP.size)[0]
+        if step + 1 < len(self):
+            return range(first, _STEP.unpack_from(self.steps, (step + 1) * _STEP.size)[0])
+        return range(first, self.record_count)
+
+    def record(self, index):
+        return _RECORD.unpack_from(self.events, self.first_record + index * _RECORD.size)
+
+    def touched(self, step):
+        # Cells a step wrote, for dirty-cell redraws while scrubbing
+        cells = set()
+        for index in self.step_records(step):
+            _, _, node, parent, _ = self.record(index)
+            cells.add(node)
+            cells.add(parent)
+        cells.discard(NONE)
+        return cells
+
+    def seek(self, step):
+        # State after the first `step` steps; moving forward within a keyframe interval only
+        # replays the new steps, anything else restarts from the nearest keyframe
+        step = max(0, min(step, len(self)))
+        position = self.position
+        if position is None or step < position or step - position > self.interval:
+            keyframe = min(step // self.interval, len(self.keys) // self.keyframe_size - 1)
+            if keyframe < 0:
+                raise ValueError("trace has no keyframes")
+            self.state.load(self.keys, keyframe * self.keyframe_size)
+            position = keyframe * self.interval
+        apply, record = self.state.apply, self.record
+        for s in range(position, step):
+            for index in self.step_records(s):
+                apply(*record(index))
+        self.position = step
+        return self.state
+
+    def close(self):
+        for data in (self.events, self.steps, self.keys):
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def record_trace(solver, grid, start, goal, base, interval=None):
+    # Run one solver headless and write its event stream as a trace; returns the step count
+    if solver == "astar":
+        events, sides, seed = a_star.search_events(grid, start, goal), 1, [Push(start, 0, None)]
+    elif solver == "bidirectional":
+        events, sides = bidirectional_search.search_events(grid, start, goal), 2
+        seed = [Push(start, 0, None, "forward"), Push(goal, 0, None, "backward")]
+        if start == goal:
+            seed.append(Meet(start, 0))
+    elif solver == "gmp":
+        events, sides, seed = forward_chaining.search_events(grid, start, goal), 1, [Push(start, None, None)]
+    else:
+        raise ValueError(f"unknown solver {solver!r}")
+    with TraceWriter(base, grid, start, goal, sides, interval, seed) as writer:
+        writer.record(events)
+        return writer.step_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a solver's step events as a binary trace")
+    parser.add_argument("solver", choices=["astar", "bidirectional", "gmp"])
+    parser.add_argument("base", help="output path prefix (.events, .steps and .keys are written)")
+    parser.add_argument("--size", type=int, default=100, help="square maze side length")
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--interval", type=int, default=None, help="steps between keyframes")
+    parser.add_argument("--maze", help="trace a .maze file (with its start and goal) instead of a random maze")
+    args = parser.parse_args()
+    if args.maze:
+        grid, start, goal, _ = load_maze(args.maze)
+        if start is None or goal is None:
+            parser.error(f"{args.maze} has no start and goal")
+    else:
+        start, goal = (0, 0), (args.size - 1, args.size - 1)
+        grid = generate_random_grid(start, goal, args.size, args.size, density=args.density, seed=args.seed)
+    steps = record_trace(args.solver, grid, start, goal, args.base, args.interval)
+    print(f"Recorded {steps} steps to {args.base}.events")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,14 @@
 
 import pygame
 import math
-from constants import ROWS, COLS, CELL_SIZE, start, goal, moves
+from constants import ROWS, CELL_SIZE, BUTTON_HEIGHT, start, goal, moves
+from maze import is_valid
+from a_star import UNSEEN
+from step_trace import NONE
 
-def draw_arrow(screen, from_cell, to_cell, color=(100, 100, 255)):
-    fx, fy = from_cell[1] * CELL_SIZE + CELL_SIZE // 2, from_cell[0] * CELL_SIZE + CELL_SIZE // 2
-    tx, ty = to_cell[1] * CELL_SIZE + CELL_SIZE // 2, to_cell[0] * CELL_SIZE + CELL_SIZE // 2
+def draw_arrow(screen, from_cell, to_cell, color=(100, 100, 255), cell_size=CELL_SIZE):
+    fx, fy = from_cell[1] * cell_size + cell_size // 2, from_cell[0] * cell_size + cell_size // 2
+    tx, ty = to_cell[1] * cell_size + cell_size // 2, to_cell[0] * cell_size + cell_size // 2
     pygame.draw.line(screen, color, (fx, fy), (tx, ty), 4)
     angle = math.atan2(ty - fy, tx - fx)
     arrow_size = 14
@@ -15,53 +18,161 @@ def draw_arrow(screen, from_cell, to_cell, color=(100, 100, 255)):
         end_y = ty - arrow_size * math.sin(angle + delta)
         pygame.draw.line(screen, color, (tx, ty), (end_x, end_y), 4)
 
-def draw_grid(screen, visited, path, parents, obstacles, open_dict):
-    font = pygame.font.SysFont(None, 20)
-    for r in range(ROWS):
-        for c in range(COLS):
-            rect = pygame.Rect(c * CELL_SIZE, r * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            color = (255, 255, 255)
-            pos = (r, c)
-            if pos in obstacles:
-                color = (0, 0, 0)
-            elif pos == start:
-                color = (0, 255, 0)
-            elif pos == goal:
-                color = (255, 0, 0)
-            elif pos in path:
-                color = (0, 0, 255)
-            elif pos in visited:
-                color = (200, 200, 200)
-
-            pygame.draw.rect(screen, color, rect)
-            pygame.draw.rect(screen, (0, 0, 0), rect, 1)
-
-            #Show cost value if this cell is in the open set (frontier)
-            if pos in open_dict:
-                cost_text = font.render(str(open_dict[pos]), True, (0, 0, 0))
-                screen.blit(cost_text, (c * CELL_SIZE + 4, r * CELL_SIZE + 4))
-
-    for pos in visited:
-        if pos == start or pos not in parents:
-            continue
-        parent = parents[pos]
-        if parent is not None:
-            draw_arrow(screen, parent, pos)
-
-
-
-def draw_candidate_arrows(screen, current_pos, visited, obstacles):
-    from constants import ROWS, COLS, moves
+_fonts = {}
+_glyphs = {}
+
+def get_font(size):
+    # SysFont lookups are slow, so each size is created once
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.SysFont(None, size)
+    return font
+
+def render_text(text, size, color=(0, 0, 0)):
+    # Pre-rendered glyph cache for cell labels and button captions
+    key = (text, size, color)
+    glyph = _glyphs.get(key)
+    if glyph is None:
+        glyph = _glyphs[key] = get_font(size).render(text, True, color)
+    return glyph
+
+def draw_link(surface, from_cell, to_cell, color, width, head, cell_size=CELL_SIZE):
+    if head:
+        draw_arrow(surface, from_cell, to_cell, color, cell_size)
+    else:
+        fx, fy = from_cell[1] * cell_size + cell_size // 2, from_cell[0] * cell_size + cell_size // 2
+        tx, ty = to_cell[1] * cell_size + cell_size // 2, to_cell[0] * cell_size + cell_size // 2
+        pygame.draw.line(surface, color, (fx, fy), (tx, ty), width)
+
+
+class GridRenderer:
+    # Keeps the grid on a persistent surface and repaints only the cells marked dirty since the
+    # last frame, plus the arrows that cross them. look(pos) returns (color, label, links) where
+    # links are (from_pos, color, width, head) tuples, or None, drawn into pos from an adjacent cell.
+    def __init__(self, rows, cols, look, cell_size=CELL_SIZE):
+        self.rows = rows
+        self.cols = cols
+        self.look = look
+        self.cell_size = cell_size
+        self.surface = pygame.Surface((cols * cell_size, rows * cell_size))
+        self.links = {}  # pos -> links drawn into pos on the last repaint
+        self.overlay = []  # (from_pos, to_pos, color) arrows drawn on top of everything else
+        self.dirty = set()
+        self.full = True
+
+    def invalidate(self, positions=None):
+        if positions is None:
+            self.full = True
+        else:
+            self.dirty.update(positions)
+
+    def set_overlay(self, arrows):
+        if arrows != self.overlay:
+            for from_pos, to_pos, _ in self.overlay + arrows:
+                self.dirty.add(from_pos)
+                self.dirty.add(to_pos)
+            self.overlay = arrows
+
+    def _in_bounds(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols
+
+    def draw(self, screen):
+        # Returns the screen rects that changed, for pygame.display.update
+        if self.full:
+            repaint = {(r, c) for r in range(self.rows) for c in range(self.cols)}
+        else:
+            repaint = {pos for pos in self.dirty if self._in_bounds(pos)}
+            # A link that used to enter a dirty cell also painted over its source cell
+            for pos in list(repaint):
+                for link in self.links.get(pos, ()):
+                    if link:
+                        repaint.add(link[0])
+        if not repaint:
+            return []
+        self.dirty.clear()
+
+        surface = self.surface
+        size = self.cell_size
+        for pos in repaint:
+            color, label, links = self.look(pos)
+            rect = pygame.Rect(pos[1] * size, pos[0] * size, size, size)
+            pygame.draw.rect(surface, color, rect)
+            pygame.draw.rect(surface, (0, 0, 0), rect, 1)
+            if label is not None and size >= 32:
+                surface.blit(render_text(label, 20), (rect.x + 4, rect.y + 4))
+            if any(links):
+                self.links[pos] = links
+            else:
+                self.links.pop(pos, None)
+
+        # Redraw every link with an endpoint in a repainted cell; links[i] is drawn in pass i,
+        # so later entries (e.g. backward-search arrows) stay on top of earlier ones
+        touched = set(repaint)
+        links = {}
+        for pos in repaint:
+            for i, link in enumerate(self.links.get(pos, ())):
+                if link:
+                    links[(i, pos, link[0])] = link
+            for dr, dc in moves:
+                neighbor = (pos[0] + dr, pos[1] + dc)
+                for i, link in enumerate(self.links.get(neighbor, ())):
+                    if link and link[0] == pos:
+                        links[(i, neighbor, pos)] = link
+        for (_, to_pos, from_pos), link in sorted(links.items()):
+            draw_link(surface, from_pos, to_pos, *link[1:], size)
+            touched.add(from_pos)
+            touched.add(to_pos)
+        for from_pos, to_pos, color in self.overlay:
+            draw_arrow(surface, from_pos, to_pos, color, size)
+            touched.add(from_pos)
+            touched.add(to_pos)
+
+        if self.full:
+            self.full = False
+            screen.blit(surface, (0, 0))
+            return [surface.get_rect()]
+        rects = []
+        for pos in touched:
+            rect = pygame.Rect(pos[1] * size, pos[0] * size, size, size)
+            screen.blit(surface, rect, rect)
+            rects.append(rect)
+        return rects
+
+
+def a_star_cell_look(pos, grid, closed, parent, g, path, endpoints=(start, goal)):
+    cell = pos[0] * grid.cols + pos[1]
+    color = (255, 255, 255)
+    if grid.cells[cell]:
+        color = (0, 0, 0)
+    elif pos == endpoints[0]:
+        color = (0, 255, 0)
+    elif pos == endpoints[1]:
+        color = (255, 0, 0)
+    elif pos in path:
+        color = (0, 0, 255)
+    elif closed[cell]:
+        color = (200, 200, 200)
+
+    #Show cost value if this cell is in the open set (frontier)
+    label = str(g[cell]) if g[cell] != UNSEEN and not closed[cell] else None
+
+    links = ()
+    if closed[cell] and parent[cell] != UNSEEN:
+        links = ((grid.position(parent[cell]), (100, 100, 255), 4, True),)
+    return color, label, links
+
+
+def candidate_arrows(current_pos, closed, grid):
+    arrows = []
     for move in moves:
         neighbor = (current_pos[0] + move[0], current_pos[1] + move[1])
-        # Check if neighbor is within bounds
-        if (0 <= neighbor[0] < ROWS and 0 <= neighbor[1] < COLS):
-            if neighbor not in obstacles and neighbor not in visited:
-                draw_arrow(screen, current_pos, neighbor, color=(255, 140, 0))
+        # Check if neighbor is within bounds, free and not yet expanded
+        if is_valid(neighbor, grid) and not closed[grid.index(neighbor)]:
+            arrows.append((current_pos, neighbor, (255, 140, 0)))
+    return arrows
 
 
 def draw_buttons(screen):
-    font = pygame.font.SysFont(None, 24)
     top_y = ROWS * CELL_SIZE
     step_rect = pygame.Rect(0, top_y, 124, 35)
     back_rect = pygame.Rect(124, top_y, 124, 35)
@@ -73,15 +184,113 @@ def draw_buttons(screen):
     pygame.draw.rect(screen, (0, 0, 200), rand_rect)
     pygame.draw.rect(screen, (0, 0, 0), def_rect)
 
-    step_txt = font.render("Step", True, (255,255,255))
-    back_txt = font.render("Back", True, (255,255,255))
-    rand_txt = font.render("Randomize", True, (255,255,255))
-    def_txt = font.render("Default Maze", True, (255,255,255))
+    step_txt = render_text("Step", 24, (255,255,255))
+    back_txt = render_text("Back", 24, (255,255,255))
+    rand_txt = render_text("Randomize", 24, (255,255,255))
+    def_txt = render_text("Default Maze", 24, (255,255,255))
 
     screen.blit(step_txt, (step_rect.centerx - step_txt.get_width()//2, step_rect.centery - step_txt.get_height()//2))
     screen.blit(back_txt, (back_rect.centerx - back_txt.get_width()//2, back_rect.centery - back_txt.get_height()//2))
     screen.blit(rand_txt, (rand_rect.centerx - rand_txt.get_width()//2, rand_rect.centery - rand_txt.get_height()//2))
     screen.blit(def_txt, (def_rect.centerx - def_txt.get_width()//2, def_rect.centery - def_txt.get_height()//2))
 
-    pygame.display.flip()
     return step_rect, back_rect, rand_rect, def_rect
+
+
+def play_trace(reader, look, caption, partial_paths=False):
+    # Scrub a recorded step trace (step_trace.py). Step / Back or the arrow keys move one step,
+    # Page Up / Page Down one keyframe interval, Home / End to either end. look(pos, state, path)
+    # gives the cell appearance; partial_paths shows the path to the current node before the goal.
+    pygame.init()
+    grid = reader.grid
+    cell_size = max(4, min(CELL_SIZE, 960 // max(grid.rows, grid.cols)))
+    width = max(grid.cols * cell_size, 480)
+    top_y = grid.rows * cell_size
+    screen = pygame.display.set_mode((width, top_y + BUTTON_HEIGHT))
+    pygame.display.set_caption(caption)
+    clock = pygame.time.Clock()
+
+    state = reader.seek(0)
+    step = 0
+    path_cells = set()
+
+    def current_path():
+        if state.found:
+            cells = state.path()
+        elif partial_paths and state.current != NONE:
+            cells = []
+            cell = state.current
+            while cell != NONE:
+                cells.append(cell)
+                cell = state.parent[0][cell]
+        else:
+            cells = []
+        return {grid.position(cell) for cell in cells}
+
+    def go(target):
+        nonlocal step, path_cells
+        target = max(0, min(target, len(reader)))
+        if target == step:
+            return
+        lo, hi = min(step, target), max(step, target)
+        if hi - lo <= reader.interval:
+            touched = {state.current, state.meet}
+            for s in range(lo, hi):
+                touched |= reader.touched(s)
+        else:
+            touched = None
+        reader.seek(target)
+        step = target
+        new_path = current_path()
+        if touched is None:
+            renderer.invalidate()
+        else:
+            touched |= {state.current, state.meet}
+            touched.discard(NONE)
+            renderer.invalidate(grid.position(cell) for cell in touched)
+            renderer.invalidate(path_cells ^ new_path)
+        path_cells = new_path
+        draw_status()
+
+    def draw_status():
+        rect = pygame.Rect(248, top_y, width - 248, BUTTON_HEIGHT)
+        screen.fill((220, 220, 220), rect)
+        # Rendered directly: a new string every step would grow the glyph cache without bound
+        text = get_font(24).render(f"Step {step} / {len(reader)}", True, (0, 0, 0))
+        screen.blit(text, (rect.x + 10, rect.centery - text.get_height() // 2))
+        pygame.display.update(rect)
+
+    renderer = GridRenderer(grid.rows, grid.cols, lambda pos: look(pos, state, path_cells), cell_size)
+    screen.fill((220, 220, 220))
+    back_rect = pygame.Rect(0, top_y, 124, BUTTON_HEIGHT)
+    step_rect = pygame.Rect(124, top_y, 124, BUTTON_HEIGHT)
+    for rect, color, text in [(back_rect, (200, 0, 0), "Back"), (step_rect, (0, 200, 0), "Step")]:
+        pygame.draw.rect(screen, color, rect)
+        label = render_text(text, 24, (255, 255, 255))
+        screen.blit(label, (rect.centerx - label.get_width() // 2, rect.centery - label.get_height() // 2))
+    pygame.display.flip()
+    draw_status()
+
+    keys = {pygame.K_RIGHT: 1, pygame.K_LEFT: -1, pygame.K_PAGEDOWN: reader.interval, pygame.K_PAGEUP: -reader.interval}
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if step_rect.collidepoint(event.pos):
+                    go(step + 1)
+                elif back_rect.collidepoint(event.pos):
+                    go(step - 1)
+            elif event.type == pygame.KEYDOWN:
+                if event.key in keys:
+                    go(step + keys[event.key])
+                elif event.key == pygame.K_HOME:
+                    go(0)
+                elif event.key == pygame.K_END:
+                    go(len(reader))
+        dirty = renderer.draw(screen)
+        if dirty:
+            pygame.display.update(dirty)
+        clock.tick(60)
+    pygame.quit()